@@ -0,0 +1,213 @@
+# Asyncio runtime: frame capture as a producer task, recognition in executors, awaitable clicks and waits
+
+import asyncio
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from config import *
+from card_detection import capture_card_region, start_card_recognition, vote_card
+from screen_capture import CARD_BOX_TOP_LEFT, get_clock
+from ui_interaction import (capture_card_face, is_option_available, option_watcher, click_ready, click_cash_out,
+                            CardSettleTracker)
+from background_writer import write_line
+from game_loop import GameLoop, WAIT_READY, CHOOSE, WAIT_CARD, RECOGNIZE, RESOLVE
+
+# One polled sample of the screen: card face snapshot and whether the option pixel is lit
+Frame = namedtuple("Frame", ["sequence", "face", "option"])
+
+async def clock_sleep(seconds):
+    """Sleep on the injected clock (see screen_capture.set_clock) without blocking the event loop
+
+    A replay's virtual clock advances at once; the real one is awaited.
+    """
+    clock = get_clock()
+    if clock is time:
+        await asyncio.sleep(seconds)
+    else:
+        clock.sleep(seconds)
+        await asyncio.sleep(0)
+
+class FrameProducer:
+    """Samples the card face and option pixel every interval on a dedicated capture thread"""
+
+    def __init__(self, interval=CARD_POLL_INTERVAL):
+        self.interval = interval
+        # A single thread keeps one mss handle and keeps grabs in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
+        self.latest = None
+        self.condition = asyncio.Condition()
+
+    def capture(self, sequence):
+        return Frame(sequence, capture_card_face(), is_option_available())
+
+    async def run(self):
+        """Capture frames until cancelled (capture errors end the task)"""
+        loop = asyncio.get_running_loop()
+        sequence = 0
+        while True:
+            frame = await loop.run_in_executor(self.executor, self.capture, sequence)
+            async with self.condition:
+                self.latest = frame
+                self.condition.notify_all()
+            sequence += 1
+            await clock_sleep(self.interval)
+
+    async def next_frame(self, after=-1):
+        """Wait for a frame newer than sequence after"""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.latest is not None and self.latest.sequence > after)
+            return self.latest
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+class AsyncGameLoop(GameLoop):
+    """GameLoop whose handlers are coroutines, so waits, clicks and recognition overlap
+
+    While a card is being recognised the loop is already watching for the next round's
+    options; the watch is cancelled if the round ends the game.
+    """
+
+    def __init__(self, game_state, poll_interval=CARD_POLL_INTERVAL):
+        super().__init__(game_state)
+        self.frames = FrameProducer(poll_interval)
+        # Clicks run one at a time, in order, off the event loop
+        self.input_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="input")
+        self.option_task = None
+        self.click_sequence = -1  # Sequence of the last frame captured before the latest click
+
+    async def step(self):
+        """Run the current state's handler coroutine and move to the state it returns"""
+        handler, timeout = self.enter_state()
+        start = time.perf_counter_ns()
+        next_state = await handler(timeout)
+        self.leave_state(next_state, time.perf_counter_ns() - start)
+
+    async def play(self):
+        while True:
+            await self.step()
+
+    async def run(self):
+        """Play games until interrupted, stopping cleanly if either the producer or the game fails"""
+        producer = asyncio.create_task(self.frames.run())
+        player = asyncio.create_task(self.play())
+        try:
+            done, pending = await asyncio.wait({producer, player}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()  # Re-raise CaptureExhausted and other errors
+        finally:
+            for task in (producer, player):
+                task.cancel()
+            await asyncio.gather(producer, player, return_exceptions=True)
+            self.cancel_option_watch()
+            self.frames.close()
+            self.input_executor.shutdown(wait=False)
+
+    async def click(self, click):
+        """Run a click on the input thread, noting the last frame seen before it"""
+        frame = await self.frames.next_frame()
+        self.click_sequence = frame.sequence
+        await asyncio.get_running_loop().run_in_executor(self.input_executor, click)
+        return frame
+
+    async def wait_option(self, timeout):
+        """Wait for the option pixel, returning False on timeout
+
+        Timeouts are checked against the injected clock on every new frame, so replays time out in
+        replayed time.
+        """
+        start = get_clock().time()
+        sequence = -1
+        while True:
+            frame = await self.frames.next_frame(sequence)
+            sequence = frame.sequence
+            elapsed = get_clock().time() - start
+            if frame.option:
+                option_watcher.record_latency(elapsed)
+                return True
+            if elapsed >= timeout:
+                return False
+
+    def watch_for_options(self):
+        """Start watching for the next round's options in the background"""
+        self.cancel_option_watch()
+        self.option_task = asyncio.create_task(self.wait_option(MAX_OPTION_WAIT_TIME))
+
+    def cancel_option_watch(self):
+        if self.option_task is not None:
+            self.option_task.cancel()
+            self.option_task = None
+
+    async def wait_ready(self, timeout):
+        # Click Ready once and wait for the options, re-clicking only if nothing changes
+        for attempt in range(MAX_READY_ATTEMPTS):
+            if (await self.frames.next_frame()).option:
+                break
+            await self.click(click_ready)
+            if await self.wait_option(READY_RECLICK_INTERVAL):
+                break
+        else:
+            write_line("Failed to detect options after maximum attempts")
+            return WAIT_READY
+        if self.game_start is None:
+            self.game_start = time.perf_counter_ns()
+        return CHOOSE
+
+    async def choose(self, timeout):
+        game_state = self.game_state
+        if game_state.round > 1:
+            # Usually already running since RECOGNIZE
+            if self.option_task is None:
+                self.watch_for_options()
+            task, self.option_task = self.option_task, None
+            if not await task:
+                write_line(f"Options for round {game_state.round} not detected, restarting")
+                game_state.reset_round()
+                return WAIT_READY
+
+        click = self.choice_click()
+        frame = await self.click(click)
+        self.baseline = frame.face
+        return WAIT_CARD
+
+    async def wait_card(self, timeout):
+        # Same settle logic as wait_for_card_to_appear(), fed by the producer's frames after the click
+        tracker = CardSettleTracker(self.baseline)
+        start = get_clock().time()
+        sequence = self.click_sequence
+        while get_clock().time() - start < timeout:
+            frame = await self.frames.next_frame(sequence)
+            sequence = frame.sequence
+            if tracker.update(frame.face):
+                break
+        # On a timeout carry on anyway; recognition decides whether a card is there
+        return RECOGNIZE
+
+    async def recognize(self, timeout):
+        loop = asyncio.get_running_loop()
+        screen = await loop.run_in_executor(self.frames.executor, capture_card_region)
+        recognition = start_card_recognition(screen, CARD_BOX_TOP_LEFT)
+
+        # Watch for the next round's options while this card is still being processed
+        if self.game_state.round < 4:
+            self.watch_for_options()
+        if self.take_black_card(screen):
+            return RESOLVE
+
+        self.card, timings = await loop.run_in_executor(None, recognition.result)
+        if not recognition.confident():
+            # Extra grabs go through the capture thread, between the producer's frames
+            self.card = await loop.run_in_executor(self.frames.executor, vote_card, recognition)
+        self.game_state.add_card(self.card)
+        return RESOLVE
+
+    async def resolve(self, timeout):
+        next_state = GameLoop.resolve(self, timeout)
+        if next_state != CHOOSE:
+            self.cancel_option_watch()
+        return next_state
+
+    async def cashout(self, timeout):
+        await self.click(click_cash_out)
+        self.game_state.cash_out()
+        return WAIT_READY
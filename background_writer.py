@@ -0,0 +1,112 @@
+# Background writer thread for debug images, dataset records and console output
+
+import queue
+import sys
+import threading
+from config import *
+
+class BackgroundWriter:
+    """Runs write jobs on one daemon thread fed by a bounded queue, so disk stalls never block the bot
+
+    Under pressure (queue at least half full) sampled jobs such as debug images are thinned to one
+    in sample_every; when the queue is full any new job is dropped and counted.
+    """
+
+    def __init__(self, max_size=WRITER_QUEUE_SIZE, sample_every=WRITER_SAMPLE_EVERY):
+        self.queue = queue.Queue(max_size)
+        self.high_water = max(1, max_size // 2)
+        self.sample_every = sample_every
+        self.sampled = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self.run, name="background-writer", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            try:
+                job()
+            except Exception as e:
+                print(f"Warning: Background write failed: {str(e)}")
+
+    def submit(self, job, sample=False):
+        """Queue job() without blocking, returning False if it was sampled out or dropped"""
+        if sample and self.queue.qsize() >= self.high_water:
+            self.sampled += 1
+            if self.sampled % self.sample_every:
+                self.dropped += 1
+                return False
+        try:
+            self.queue.put_nowait(job)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=WRITER_FLUSH_TIMEOUT):
+        """Wait until every job queued so far has run, returning False on timeout"""
+        done = threading.Event()
+        try:
+            self.queue.put(done.set, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=WRITER_FLUSH_TIMEOUT):
+        """Flush outstanding jobs and stop the thread"""
+        if not self.flush(timeout):
+            print("Warning: Background writer did not finish before the timeout")
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self.dropped:
+            print(f"Background writer dropped {self.dropped} writes under load")
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_background_writer():
+    """Return the shared background writer, starting its thread on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BackgroundWriter()
+    return _writer
+
+def write_image(path, image):
+    """Encode and save an image in the background (sampled under pressure)"""
+    import cv2
+
+    # Copy now: the caller may reuse the buffer before the write runs
+    image = image.copy()
+    return get_background_writer().submit(lambda: cv2.imwrite(path, image), sample=True)
+
+def emit_line(text):
+    """Write a line and its newline in one call, so lines from different threads never run together"""
+    sys.stdout.write(f"{text}\n")
+    sys.stdout.flush()
+
+def write_line(text):
+    """Print a line of output from the background thread, in order with every other write_line()
+
+    Console output is never dropped: if the queue is full the line is written straight away.
+    """
+    if not get_background_writer().submit(lambda: emit_line(text)):
+        emit_line(text)
+
+def flush_background_writer(timeout=WRITER_FLUSH_TIMEOUT):
+    """Wait for queued writes, if the writer was ever started"""
+    if _writer is not None:
+        return _writer.flush(timeout)
+    return True
+
+def close_background_writer(timeout=WRITER_FLUSH_TIMEOUT):
+    """Flush and stop the writer, if it was ever started"""
+    global _writer
+    if _writer is not None:
+        _writer.close(timeout)
+        _writer = None
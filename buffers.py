@@ -0,0 +1,44 @@
+# Preallocated, reusable array buffers for the capture and recognition hot path
+
+import threading
+import numpy as np
+from config import *
+
+_local = threading.local()
+
+def scratch(name, shape, dtype=np.uint8):
+    """Return this thread's buffer for name, allocating only on first use or when the shape changes
+
+    The contents are only valid until the same thread asks for the same buffer again.
+    Buffers are per thread, so the concurrent value and suit stages never share one.
+    """
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    buffer = buffers.get(name)
+    if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+        buffer = buffers[name] = np.empty(shape, dtype)
+    return buffer
+
+class FrameRing:
+    """A fixed set of frame buffers handed out in rotation
+
+    Frames that outlive the call that captured them (e.g. a card box being recognised in the
+    background) come from here; a frame is only overwritten size captures later.
+    """
+
+    def __init__(self, size=CARD_FRAME_BUFFERS):
+        self.size = size
+        self.frames = {}  # {shape: [buffers]}
+        self.next_index = 0
+        self.lock = threading.Lock()
+
+    def next(self, shape, dtype=np.uint8):
+        """Return the next buffer in rotation for frames of this shape"""
+        with self.lock:
+            frames = self.frames.get(shape)
+            if frames is None:
+                frames = self.frames[shape] = [np.empty(shape, dtype) for _ in range(self.size)]
+            frame = frames[self.next_index % self.size]
+            self.next_index += 1
+            return frame
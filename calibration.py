@@ -0,0 +1,135 @@
+# One-time calibration of the screen layout for the current resolution and monitor
+
+import argparse
+import json
+import os
+import cv2
+import mss
+import numpy as np
+from config import *
+from template_bank import load_number_templates, load_glyph_samples, threshold_number_image
+
+CALIBRATION_MIN_SCORE = 0.7  # Minimum TM_CCOEFF_NORMED score to trust the located card
+
+def monitor_geometry(monitor_index):
+    """Return (left, top, width, height) of an mss monitor"""
+    with mss.mss() as sct:
+        monitor = sct.monitors[monitor_index]
+    return monitor['left'], monitor['top'], monitor['width'], monitor['height']
+
+def grab_monitor(monitor_index):
+    """Grab a full BGR frame of the monitor"""
+    with mss.mss() as sct:
+        return np.array(sct.grab(sct.monitors[monitor_index]))[:, :, :3]
+
+def centered_offset(width, height, scale):
+    """Offset of a reference layout scaled by scale and centered on a width x height screen"""
+    ref_width, ref_height = REFERENCE_RESOLUTION
+    return ((width - ref_width * scale) / 2, (height - ref_height * scale) / 2)
+
+def locate_card(frame, scale):
+    """Find the value glyph on a full frame at a known scale, returning (score, top-left) of the best match
+
+    Number templates and glyph samples are crops of the OCR region on the reference layout,
+    so wherever one matches, the OCR region's top-left is at the match location. A 33 px glyph
+    cannot pin the scale well enough for buttons hundreds of pixels away, so only its position is used.
+    """
+    thresh = threshold_number_image(frame)
+    templates = [threshold_number_image(image) for image in load_number_templates().values()]
+    templates += [threshold_number_image(image) for label, image in load_glyph_samples()]
+
+    best = (-1.0, None)
+    for template in templates:
+        width = round(template.shape[1] * scale)
+        height = round(template.shape[0] * scale)
+        if width < 4 or height < 4 or width > thresh.shape[1] or height > thresh.shape[0]:
+            continue
+        resized = cv2.resize(template, (width, height), interpolation=cv2.INTER_AREA)
+        result = cv2.matchTemplate(thresh, resized, cv2.TM_CCOEFF_NORMED)
+        _, score, _, location = cv2.minMaxLoc(result)
+        if score > best[0]:
+            best = (score, location)
+    return best
+
+def scale_point(point, scale, offset):
+    """Map a reference-layout point onto the calibrated layout"""
+    if point is None:
+        return None
+    return (round(offset[0] + point[0] * scale), round(offset[1] + point[1] * scale))
+
+def build_layout(monitor_index, origin, resolution, scale, offset, score=None):
+    """Layout file contents: every LAYOUT_POINTS coordinate scaled from the reference layout"""
+    return {
+        'monitor': monitor_index,
+        'origin': list(origin),
+        'resolution': list(resolution),
+        'scale': scale,
+        'offset': [offset[0], offset[1]],
+        'score': score,
+        'points': {name: scale_point(point, scale, offset) for name, point in REFERENCE_LAYOUT.items()},
+    }
+
+def save_layout(layout, path=LAYOUT_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(layout, f, indent=2)
+    os.replace(tmp_path, path)
+
+def calibrate(monitor_index=MONITOR_INDEX, screenshot=None, scale=None):
+    """Scale the layout with the resolution (or a given scale), place it on the card, then write and return it"""
+    if screenshot is None:
+        left, top, width, height = monitor_geometry(monitor_index)
+        frame = grab_monitor(monitor_index)
+    else:
+        left, top = MONITOR_ORIGIN
+        frame = cv2.imread(screenshot)
+        if frame is None:
+            raise ValueError(f"Could not read screenshot {screenshot}")
+        height, width = frame.shape[:2]
+
+    score = None
+    if scale is None:
+        # The game UI scales with the screen height; the card search only places it
+        scale = height / REFERENCE_RESOLUTION[1]
+        # Needs a card on screen whose value has a template in Numbers/ or Glyphs/
+        score, location = locate_card(frame, scale)
+        if score >= CALIBRATION_MIN_SCORE:
+            ocr_x, ocr_y = REFERENCE_LAYOUT["OCR_TOP_LEFT"]
+            offset = (location[0] - ocr_x * scale, location[1] - ocr_y * scale)
+        else:
+            print(f"Warning: Card not found (best score {score:.2f}), assuming a centered layout")
+            offset = centered_offset(width, height, scale)
+    else:
+        offset = centered_offset(width, height, scale)
+
+    layout = build_layout(monitor_index, (left, top), (width, height), scale, offset, score)
+    save_layout(layout)
+    return layout
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Calibrate the screen layout for this resolution and monitor")
+    parser.add_argument("--monitor", type=int, default=MONITOR_INDEX, help="mss monitor number")
+    parser.add_argument("--screenshot", default=None, help="Calibrate from a saved full-screen screenshot")
+    parser.add_argument("--scale", type=float, default=None,
+                        help="Skip the card search and use this scale with a centered layout")
+    parser.add_argument("--reset", action="store_true", help="Delete the layout file (back to 1440p)")
+    args = parser.parse_args()
+
+    if args.reset:
+        if os.path.exists(LAYOUT_FILE):
+            os.remove(LAYOUT_FILE)
+        print(f"Removed {LAYOUT_FILE}; using the reference layout")
+        return
+
+    layout = calibrate(args.monitor, args.screenshot, args.scale)
+    width, height = layout['resolution']
+    score = f", match score {layout['score']:.2f}" if layout['score'] is not None else ""
+    print(f"Calibrated {width}x{height} on monitor {layout['monitor']}: "
+          f"scale {layout['scale']:.3f}, offset ({layout['offset'][0] + 0.0:.0f}, {layout['offset'][1] + 0.0:.0f}){score}")
+    for name, point in layout['points'].items():
+        print(f"  {name}: {point}")
+    print(f"Saved {LAYOUT_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -2,92 +2,117 @@
 
 import cv2
 import numpy as np
-import pytesseract
-from PIL import Image
 import os
-import mss
-import mss.tools
+import time
+from itertools import count
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from config import *
+from screen_capture import get_capture, get_clock, CARD_BOX_TOP_LEFT, CARD_BOX_BOTTOM_RIGHT
+from template_bank import get_template_bank, threshold_number_image
+from glyph_classifier import get_glyph_classifier
+from suit_matcher import get_suit_matcher
+from recognition_cache import get_card_cache, card_cache_key
+from cards import Card
+from buffers import scratch, FrameRing
+from dataset import get_dataset_writer
+from instrumentation import timed, record, increment
+from background_writer import write_image, write_line
 
-# Set Tesseract path
-pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+# Tesseract is only an optional fallback for the glyph classifier, imported on first use
+_pytesseract = None
+TESSERACT_CONFIG = r'--oem 3 --psm 6 -c tessedit_char_whitelist=23456789JQKAjqka10'
+
+def get_tesseract():
+    """Return pytesseract pointed at TESSERACT_PATH, or None if it is not installed"""
+    global _pytesseract
+    if _pytesseract is None:
+        try:
+            import pytesseract
+        except ImportError:
+            pytesseract = False
+        else:
+            # Set Tesseract path
+            pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+        _pytesseract = pytesseract
+    return _pytesseract or None
+
+def run_tesseract(thresh):
+    """Return Tesseract's word data for a thresholded region, or None (disabling it) if the binary is missing"""
+    global _pytesseract
+    pytesseract = get_tesseract()
+    try:
+        return pytesseract.image_to_data(thresh, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+    except pytesseract.TesseractNotFoundError:
+        write_line(f"Warning: Tesseract not found at {TESSERACT_PATH}, skipping OCR fallback")
+        _pytesseract = False
+        return None
 
 def capture_screen():
-    """Capture the current screen using mss"""
-    with mss.mss() as sct:
-        # Use the entire screen
-        monitor = sct.monitors[1]
-        screen = np.array(sct.grab(monitor))
-        # Convert BGRA to BGR (remove alpha channel)
-        return screen[:, :, :3]
+    """Capture the current screen using the shared capture service"""
+    return get_capture().grab_full()
+
+_card_frames = FrameRing()
+
+@timed("capture_card")
+def capture_card_region():
+    """Capture only the card box (value and suit regions), origin at CARD_BOX_TOP_LEFT
+
+    The frame comes from a small ring of preallocated buffers and is overwritten
+    CARD_FRAME_BUFFERS captures later.
+    """
+    height = CARD_BOX_BOTTOM_RIGHT[1] - CARD_BOX_TOP_LEFT[1]
+    width = CARD_BOX_BOTTOM_RIGHT[0] - CARD_BOX_TOP_LEFT[0]
+    return get_capture().grab_card(out=_card_frames.next((height, width, 3)))
+
+_debug_image_counter = count()
 
 def save_debug_image(image, filename="debug_card"):
     """Save an image for debugging purposes"""
     debug_dir = "debug_images"
     os.makedirs(debug_dir, exist_ok=True)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filepath = os.path.join(debug_dir, f"{filename}_{timestamp}.png")
+    # Microseconds plus a sequence number, so images saved in the same second never overwrite each other
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    filepath = os.path.join(debug_dir, f"{filename}_{timestamp}_{next(_debug_image_counter)}.png")
     
-    cv2.imwrite(filepath, image)
+    # Encoded and written on the background writer thread
+    write_image(filepath, image)
     # print(f"Saved debug image: {filepath}")
     return filepath
 
-def crop_ocr_region(screen):
+def crop_region(screen, top_left, bottom_right, origin=(0, 0)):
+    """Crop a region given in screen coordinates from an image whose top-left sits at origin"""
+    ox, oy = origin
+    x1, y1 = top_left
+    x2, y2 = bottom_right
+    return screen[y1 - oy:y2 - oy, x1 - ox:x2 - ox]
+
+def crop_ocr_region(screen, origin=(0, 0)):
     """Crop the OCR region (card value) from the screen using exact coordinates"""
-    x1, y1 = OCR_TOP_LEFT
-    x2, y2 = OCR_BOTTOM_RIGHT
-    return screen[y1:y2, x1:x2]
+    return crop_region(screen, OCR_TOP_LEFT, OCR_BOTTOM_RIGHT, origin)
 
-def crop_suit_region(screen):
+def crop_suit_region(screen, origin=(0, 0)):
     """Crop the suit region from the screen using exact coordinates"""
-    x1, y1 = SUIT_TOP_LEFT
-    x2, y2 = SUIT_BOTTOM_RIGHT
-    return screen[y1:y2, x1:x2]
-
-def load_number_templates():
-    """Load number template images for fallback recognition"""
-    templates = {}
-    if os.path.exists(NUMBER_TEMPLATE_DIR):
-        for filename in os.listdir(NUMBER_TEMPLATE_DIR):
-            if filename.endswith('.png'):
-                number = filename.split('.')[0]  # Get number from filename (e.g., "2" from "2.png")
-                template_path = os.path.join(NUMBER_TEMPLATE_DIR, filename)
-                templates[number] = cv2.imread(template_path)
-                print(f"Loaded number template: {number}")
-    else:
-        print(f"Warning: Number template directory not found at {NUMBER_TEMPLATE_DIR}")
-    return templates
-
-def detect_number_with_template(ocr_region, number_templates):
-    """Use template matching to identify card numbers when OCR fails"""
-    # Convert to grayscale for template matching
-    gray = cv2.cvtColor(ocr_region, cv2.COLOR_BGR2GRAY)
-    
-    # Apply binary threshold as in OCR
-    _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
+    return crop_region(screen, SUIT_TOP_LEFT, SUIT_BOTTOM_RIGHT, origin)
+
+def detect_number_with_template(ocr_region, number_variants=None):
+    """Use template matching to identify card numbers when OCR fails, returning (number, score)"""
+    if number_variants is None:
+        number_variants = get_template_bank().number_variants
+    
+    # Grayscale and threshold as in OCR
+    thresh = threshold_number_image(ocr_region)
     
     best_match = None
     best_score = -1
     
-    for number, template in number_templates.items():
-        # Convert template to grayscale
-        template_gray = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
-        # Apply same threshold to template
-        _, template_thresh = cv2.threshold(template_gray, 150, 255, cv2.THRESH_BINARY_INV)
-        
-        # Try different scales for better matching
-        for scale in [0.8, 0.9, 1.0, 1.1, 1.2]:
-            # Resize the template
-            width = int(template_thresh.shape[1] * scale)
-            height = int(template_thresh.shape[0] * scale)
-            
+    for number, variants in number_variants.items():
+        # Templates are already thresholded and resized to each scale
+        for scale, resized_template in variants:
             # Skip if the template is too large for the region
-            if width > thresh.shape[1] or height > thresh.shape[0]:
+            if resized_template.shape[0] > thresh.shape[0] or resized_template.shape[1] > thresh.shape[1]:
                 continue
-                
-            resized_template = cv2.resize(template_thresh, (width, height), interpolation=cv2.INTER_AREA)
             
             try:
                 # Template matching
@@ -98,135 +123,404 @@ def detect_number_with_template(ocr_region, number_templates):
                     best_score = max_val
                     best_match = number
             except Exception as e:
-                print(f"Error matching template for number {number} at scale {scale}: {str(e)}")
+                write_line(f"Error matching template for number {number} at scale {scale}: {str(e)}")
     
     # Check if match is confident enough
-    if best_score > 0.45:  # Adjust threshold as needed
-        print(f"Template matching found: {best_match} with score {best_score:.2f}")
-        return best_match
+    if best_score > NUMBER_MATCH_THRESHOLD:
+        return best_match, best_score
     
-    return None
+    return None, best_score
 
-def detect_card_value(screen):
-    """Extract the card value using OCR with exact coordinates, with template fallback"""
-    # Crop the OCR region
-    ocr_region = crop_ocr_region(screen)
+def detect_value_with_tesseract(thresh):
+    """Read the card value from a thresholded region with Tesseract, returning (value, confidence 0-1)"""
+    data = run_tesseract(thresh)
+    if data is None:
+        return None, 0.0
     
-    # Convert to grayscale for OCR
-    gray = cv2.cvtColor(ocr_region, cv2.COLOR_BGR2GRAY)
+    # Clean up text and map to card value (word confidences are 0-100, -1 for non-words)
+    words = [(word, float(conf)) for word, conf in zip(data['text'], data['conf']) if word.strip()]
+    text = ''.join(word for word, conf in words).upper().replace(' ', '')
+    confidence = max((conf for word, conf in words), default=0.0) / 100
     
-    # Apply binary threshold for better text extraction
-    _, thresh = cv2.threshold(gray, 150, 255, cv2.THRESH_BINARY_INV)
+    # Handle OCR errors and map to values
+    if '1' in text or '0' in text:
+        return '10', confidence
+    for val in CARD_VALUES.keys():
+        if val in text:
+            return val, confidence
     
-    # Use Tesseract to extract text
-    custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=23456789JQKAjqka10'
-    text = pytesseract.image_to_string(thresh, config=custom_config).strip()
+    write_line(f"OCR failed with text: '{text}'")
+    return None, 0.0
+
+def detect_card_value(screen, origin=(0, 0)):
+    """Extract the card value with the in-process glyph classifier, falling back to OCR and templates"""
+    value, confidence, method = read_card_value(screen, origin)
+    return value
+
+@timed("ocr")
+def read_card_value(screen, origin=(0, 0), fallback=True):
+    """Read the card value, returning (value, confidence, method)
+
+    Confidence is the score of the method ('glyph', 'tesseract' or 'template') that produced
+    the value, on that method's own scale. Without fallback only the in-process glyph
+    classifier and template match run, quietly, with no Tesseract and no debug image.
+    """
+    # Crop the OCR region
+    ocr_region = crop_ocr_region(screen, origin)
     
-    # Clean up text and map to card value
-    text = text.upper().replace(' ', '')
+    # Convert to grayscale and apply binary threshold for better text extraction (into reused buffers)
+    shape = ocr_region.shape[:2]
+    thresh = threshold_number_image(ocr_region, scratch('ocr_gray', shape), scratch('ocr_thresh', shape))
     
-    # Handle OCR errors and map to values
-    if '1' in text or '0' in text:
-        return '10'
-    elif any(val in text for val in CARD_VALUES.keys()):
-        for val in CARD_VALUES.keys():
-            if val in text:
-                return val
+    # Nearest-neighbour match against the known glyphs (no subprocess)
+    value, score = get_glyph_classifier().classify(thresh)
+    if value:
+        return value, score, 'glyph'
+    
+    # Tesseract is slow (subprocess per call) so only use it when the classifier is unsure
+    if fallback and USE_TESSERACT_FALLBACK and get_tesseract() is not None:
+        value, confidence = detect_value_with_tesseract(thresh)
+        if value:
+            return value, confidence, 'tesseract'
     
-    # If OCR fails, attempt to use template matching as fallback
-    print(f"OCR failed with text: '{text}'. Attempting template matching...")
-    number_templates = load_number_templates()
-    template_match = detect_number_with_template(ocr_region, number_templates)
+    # If the classifier and OCR both fail, attempt to use template matching as fallback
+    template_match, template_score = detect_number_with_template(ocr_region)
     
     if template_match:
-        return template_match
+        if fallback:
+            write_line(f"Template matching found: {template_match} with score {template_score:.2f}")
+        return template_match, template_score, 'template'
+    
+    if fallback:
+        # Save debug images only on complete failure
+        save_debug_image(thresh, "ocr_fail_processed")
+        write_line("Warning: Could not detect card value")
+    return None, template_score, 'template'
+
+def crop_ink_region(screen, origin=(0, 0)):
+    """Crop the part of the suit region below the value, so the value's dark background is not counted as ink"""
+    top_left = (SUIT_TOP_LEFT[0], max(SUIT_TOP_LEFT[1], OCR_BOTTOM_RIGHT[1]))
+    return crop_region(screen, top_left, SUIT_BOTTOM_RIGHT, origin)
+
+def detect_card_color(screen, origin=(0, 0)):
+    """Classify the suit ink as 'red' or 'black' from pixel colors, returning (color, confidence)"""
+    suit_region = crop_ink_region(screen, origin)
+    mask = scratch('ink_mask', suit_region.shape[:2])
+    red = cv2.countNonZero(cv2.inRange(suit_region, RED_INK_LOWER, RED_INK_UPPER, dst=mask))
+    black = cv2.countNonZero(cv2.inRange(suit_region, BLACK_INK_LOWER, BLACK_INK_UPPER, dst=mask))
     
-    # Save debug images only on complete failure
-    save_debug_image(thresh, "ocr_fail_processed")
+    if red + black < COLOR_MIN_INK_PIXELS:
+        return None, 0.0
     
-    print(f"Warning: Could not detect card value. OCR text: '{text}'")
-    return None
+    if red > black:
+        return 'red', (red - black) / (red + black)
+    return 'black', (black - red) / (red + black)
 
-def load_suit_templates():
-    """Load the suit template images"""
-    templates = {}
-    for suit in SUITS:
-        template_path = os.path.join(TEMPLATE_DIR, f"{suit}.png")
-        if os.path.exists(template_path):
-            templates[suit] = cv2.imread(template_path)
-        else:
-            print(f"Warning: Template for {suit} not found at {template_path}")
-    return templates
+def score_card_suits(screen, origin=(0, 0), suits=None):
+    """Score suits (all by default) against the suit region in one batched match, returning {suit: score}"""
+    suit_region = crop_suit_region(screen, origin)
+    return get_suit_matcher(suits).suit_scores(suit_region)
 
-def detect_card_suit(screen, templates):
+def detect_card_suit(screen, origin=(0, 0), suits=None):
     """Detect the card suit using template matching with exact coordinates"""
-    # Crop the suit region
-    suit_region = crop_suit_region(screen)
-    
-    # Save the suit region for debugging
-    # save_debug_image(suit_region, "suit_region")
+    suit, confidence = read_card_suit(screen, origin, suits)
+    return suit
+
+def read_card_suit(screen, origin=(0, 0), suits=None, warn=True):
+    """Detect the card suit, returning (suit, confidence) where confidence is the best match score"""
+    # All candidate suits and scales are scored together
+    scores = score_card_suits(screen, origin, suits)
+    if not scores:
+        write_line("Warning: Could not detect card suit. No suit templates loaded")
+        return None, 0.0
     
-    best_match = None
-    best_score = -1
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best_match, best_score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else -1
     
-    for suit, template in templates.items():
-        # Try different scales of the template for better matching
-        for scale in [0.7, 0.85, 1.0, 1.15, 1.3]:
-            # Resize the template
-            width = int(template.shape[1] * scale)
-            height = int(template.shape[0] * scale)
-            
-            # Skip if the template is too large for the region
-            if width > suit_region.shape[1] or height > suit_region.shape[0]:
-                continue
-                
-            resized_template = cv2.resize(template, (width, height), interpolation=cv2.INTER_AREA)
-            
-            try:
-                # Use the template as-is for matching (no preprocessing)
-                result = cv2.matchTemplate(suit_region, resized_template, cv2.TM_CCOEFF_NORMED)
-                _, max_val, _, _ = cv2.minMaxLoc(result)
-                
-                if max_val > best_score:
-                    best_score = max_val
-                    best_match = suit
-            except Exception as e:
-                print(f"Error matching template for {suit} at scale {scale}: {str(e)}")
-    
-    # Check if match is confident enough
-    if best_score > 0.5:  # Lowered threshold for better detection
-        return best_match
+    # Check if match is confident enough and clearly ahead of the next suit
+    if best_score > SUIT_MATCH_THRESHOLD and best_score - runner_up >= SUIT_MIN_MARGIN:
+        return best_match, best_score
     
     # Save debug image on failure
-    # save_debug_image(suit_region, "suit_fail_region")
+    # save_debug_image(crop_suit_region(screen, origin), "suit_fail_region")
     
-    print(f"Warning: Could not detect card suit. Best match: {best_match} with score {best_score}")
-    return None
+    if warn:
+        write_line(f"Warning: Could not detect card suit. Best match: {best_match} with score {best_score:.2f} "
+              f"(runner-up {runner_up:.2f})")
+    return None, best_score
 
-def identify_card(screen=None):
-    """Identify the card on screen (both value and suit)"""
-    if screen is None:
-        screen = capture_screen()
-    
-    # Detect value
-    value = detect_card_value(screen)
-    # if value:
-    #     print(f"Successfully detected card value: {value}")
-    
-    # Detect suit
-    templates = load_suit_templates()
-    suit = detect_card_suit(screen, templates)
-    # if suit:
-    #     print(f"Successfully detected card suit: {suit}")
+@timed("suit")
+def detect_card_suit_and_color(screen, origin=(0, 0), warn=True):
+    """Detect the suit, using a confident color to halve the candidates, returning (suit, color, confidence)"""
+    color, confidence = detect_card_color(screen, origin)
+    if confidence < COLOR_CONFIDENCE_THRESHOLD:
+        color = None
+    candidates = {'red': RED_SUITS, 'black': BLACK_SUITS}.get(color)
     
+    suit, confidence = read_card_suit(screen, origin, candidates, warn)
+    if suit:
+        color = 'red' if suit in RED_SUITS else 'black'
+    return suit, color, confidence
+
+def build_card(value, suit, color=None):
+    """Combine detected value and suit into a Card, a partial card dict, or None if neither was found"""
     if value and suit:
-        return {'value': value, 'suit': suit, 'numeric_value': CARD_VALUES.get(value)}
+        return Card.from_value(value, suit)
     elif value:
-        print(f"Partial card detection: Value {value} detected but suit unknown")
-        return {'value': value, 'suit': None, 'numeric_value': CARD_VALUES.get(value)}
+        write_line(f"Partial card detection: Value {value} detected but suit unknown")
+        return {'value': value, 'suit': None, 'numeric_value': CARD_VALUES.get(value), 'color': color}
     elif suit:
-        print(f"Partial card detection: Suit {suit} detected but value unknown")
-        return {'value': None, 'suit': suit, 'numeric_value': None}
+        write_line(f"Partial card detection: Suit {suit} detected but value unknown")
+        return {'value': None, 'suit': suit, 'numeric_value': None, 'color': color}
     
-    print("Failed to identify card")
+    write_line("Failed to identify card")
     return None
+
+def timed_stage(func, *args):
+    """Run a recognition stage, returning (result, seconds taken)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+_recognition_pool = None
+
+def get_recognition_pool():
+    """Return the shared worker pool for recognition stages"""
+    global _recognition_pool
+    if _recognition_pool is None:
+        _recognition_pool = ThreadPoolExecutor(max_workers=RECOGNITION_WORKERS,
+                                               thread_name_prefix="recognition")
+    return _recognition_pool
+
+def warm_up_stage(card_box):
+    """Run the value and suit matchers once on a card box without recording or printing anything"""
+    detect_card_color(card_box, CARD_BOX_TOP_LEFT)
+    score_card_suits(card_box, CARD_BOX_TOP_LEFT)
+    ocr_region = crop_ocr_region(card_box, CARD_BOX_TOP_LEFT)
+    get_glyph_classifier().scores(threshold_number_image(ocr_region))
+    detect_number_with_template(ocr_region)
+
+def warm_up_recognition():
+    """Pay the first-card costs up front: templates, matchers, the OCR engine and the worker threads"""
+    get_template_bank()
+    get_glyph_classifier()
+    get_suit_matcher()
+    if USE_TESSERACT_FALLBACK:
+        get_tesseract()
+    
+    # A blank card box runs every matcher once on each worker, allocating its scratch buffers
+    height = CARD_BOX_BOTTOM_RIGHT[1] - CARD_BOX_TOP_LEFT[1]
+    width = CARD_BOX_BOTTOM_RIGHT[0] - CARD_BOX_TOP_LEFT[0]
+    blank = np.zeros((height, width, 3), dtype=np.uint8)
+    pool = get_recognition_pool()
+    for future in [pool.submit(warm_up_stage, blank) for _ in range(RECOGNITION_WORKERS)]:
+        future.result()
+    
+    # Run Tesseract once, so the first fallback read does not pay for starting it and loading its model
+    if USE_TESSERACT_FALLBACK and get_tesseract() is not None:
+        run_tesseract(threshold_number_image(crop_ocr_region(blank, CARD_BOX_TOP_LEFT)))
+
+class CardRecognition:
+    """Value and suit recognition running concurrently on the shared pool, short-circuited by the cache"""
+    
+    def __init__(self, screen, origin=(0, 0), use_cache=True, record_dataset=True):
+        self.start_time = time.perf_counter()
+        self.screen = screen
+        self.origin = origin
+        self.cache_key = None
+        self.cached_card = None
+        self.value_future = None
+        self.suit_future = None
+        self.readings = {}  # {'value'/'suit': (label, confidence, method)}
+        self.color = None
+        self.dataset_crop = None
+        # Offline tools that write or read a dataset themselves pass record_dataset=False
+        self.dataset_writer = get_dataset_writer() if record_dataset else None
+        
+        if use_cache:
+            # The same 52 faces recur at a fixed position, so most cards are cache hits
+            card_box = crop_region(screen, CARD_BOX_TOP_LEFT, CARD_BOX_BOTTOM_RIGHT, origin)
+            self.cache_key = card_cache_key(card_box)
+            self.cached_card = get_card_cache().get(self.cache_key)
+            self.cache_time = time.perf_counter() - self.start_time
+            if self.cached_card:
+                record("cache_hit", int(self.cache_time * 1e9))
+                # Only confidently read cards are cached
+                self.readings = {'value': (self.cached_card.value, 1.0, 'cache'),
+                                 'suit': (self.cached_card.suit, 1.0, 'cache')}
+                self.color = self.cached_card.color
+                return
+        
+        pool = get_recognition_pool()
+        # OpenCV/NumPy (and the Tesseract subprocess) release the GIL, so both stages overlap
+        self.value_future = pool.submit(timed_stage, read_card_value, screen, origin)
+        self.suit_future = pool.submit(timed_stage, detect_card_suit_and_color, screen, origin)
+    
+    def done(self):
+        """Check whether both stages have finished"""
+        if self.cached_card:
+            return True
+        return self.value_future.done() and self.suit_future.done()
+    
+    def result(self):
+        """Wait for both stages and return (card, timings) with per-stage seconds"""
+        if self.cached_card:
+            self.record(self.cached_card)
+            return self.cached_card, {'cache': self.cache_time, 'total': self.cache_time}
+        
+        (value, value_confidence, value_method), value_time = self.value_future.result()
+        (suit, color, suit_confidence), suit_time = self.suit_future.result()
+        self.readings = {'value': (value, value_confidence, value_method),
+                         'suit': (suit, suit_confidence, 'template')}
+        self.color = color
+        card = build_card(value, suit, color)
+        if self.confident():
+            if self.cache_key:
+                get_card_cache().put(self.cache_key, card)
+            self.record(card)
+        elif self.dataset_writer:
+            # Recorded with the voted card instead (see vote_card), whose extra grabs may reuse this frame's buffer
+            self.dataset_crop = crop_region(self.screen, CARD_BOX_TOP_LEFT, CARD_BOX_BOTTOM_RIGHT, self.origin).copy()
+        record("recognize", int((time.perf_counter() - self.start_time) * 1e9))
+        
+        timings = {
+            'value': value_time,
+            'suit': suit_time,
+            'total': time.perf_counter() - self.start_time,
+        }
+        return card, timings
+
+    def confident(self):
+        """Check whether both the value and the suit were read confidently (call after result())"""
+        if self.cached_card:
+            return True
+        return all(is_confident(field, *reading) for field, reading in self.readings.items())
+
+    def record(self, card):
+        """Add the card box and its label to the dataset when DATASET_DIR is set"""
+        if self.dataset_writer:
+            crop = self.dataset_crop
+            if crop is None:
+                crop = crop_region(self.screen, CARD_BOX_TOP_LEFT, CARD_BOX_BOTTOM_RIGHT, self.origin)
+            self.dataset_writer.add(crop, card)
+
+def is_confident(field, label, confidence, method=None):
+    """Check whether a 'value' or 'suit' reading can be used without a vote
+
+    Value confidences are compared with the threshold of the method that read them, as each
+    method scores on its own scale.
+    """
+    if label is None:
+        return False
+    if field == 'suit':
+        return confidence >= SUIT_CONFIDENCE_THRESHOLD
+    threshold = VALUE_CONFIDENCE_THRESHOLDS.get(method)
+    return threshold is not None and confidence >= threshold
+
+class CardVote:
+    """Value and suit readings of one card gathered over several frames
+
+    A confident first reading settles its field straight away. Otherwise each confident
+    reading from an extra frame is a vote, and a label settles the field once it has
+    quorum votes; when time runs out the most-voted label (then the most confident) wins.
+    """
+    
+    def __init__(self, quorum=RECOGNITION_VOTE_QUORUM):
+        self.quorum = quorum
+        self.tallies = {'value': {}, 'suit': {}}  # {field: {label: [votes, summed confidence]}}
+        self.settled = {}  # {field: label}
+    
+    def add(self, field, label, confidence):
+        """Count a reading as a vote for its label"""
+        if label is None or field in self.settled:
+            return
+        tally = self.tallies[field].setdefault(label, [0, 0.0])
+        tally[0] += 1
+        tally[1] += confidence
+        if tally[0] >= self.quorum:
+            self.settled[field] = label
+    
+    def settle(self, field, label):
+        self.settled[field] = label
+    
+    def unsettled(self):
+        """Fields still waiting for votes"""
+        return [field for field in self.tallies if field not in self.settled]
+    
+    def winner(self, field):
+        """The settled label, else the most-voted one, else None"""
+        if field in self.settled:
+            return self.settled[field]
+        tally = self.tallies[field]
+        if not tally:
+            return None
+        return max(tally, key=lambda label: tally[label])
+
+@timed("vote")
+def vote_card(recognition, budget=RECOGNITION_VOTE_BUDGET, max_frames=RECOGNITION_VOTE_FRAMES):
+    """Re-read the fields of an uncertain card from a few more card box grabs and return the voted card
+
+    Extra frames use only the in-process matchers (glyphs, number and suit templates), so each
+    costs a grab and a few milliseconds, and no new grab starts once the budget (seconds) is
+    spent. The voted card is what goes into the dataset.
+    """
+    deadline = time.perf_counter() + budget
+    vote = CardVote()
+    for field, (label, confidence, method) in recognition.readings.items():
+        if is_confident(field, label, confidence, method):
+            vote.settle(field, label)
+        else:
+            # A weak first reading (e.g. from a fallback) still counts as one vote
+            vote.add(field, label, confidence)
+    
+    color = recognition.color
+    frames = 0
+    while vote.unsettled() and frames < max_frames and time.perf_counter() < deadline:
+        get_clock().sleep(RECOGNITION_VOTE_INTERVAL)
+        screen = capture_card_region()
+        frames += 1
+        if 'value' in vote.unsettled():
+            value, confidence, method = read_card_value(screen, CARD_BOX_TOP_LEFT, fallback=False)
+            if is_confident('value', value, confidence, method):
+                vote.add('value', value, confidence)
+        if 'suit' in vote.unsettled():
+            suit, suit_color, confidence = detect_card_suit_and_color(screen, CARD_BOX_TOP_LEFT, warn=False)
+            color = color or suit_color
+            if is_confident('suit', suit, confidence):
+                vote.add('suit', suit, confidence)
+    
+    value = vote.winner('value')
+    suit = vote.winner('suit')
+    unsettled = vote.unsettled()
+    write_line(f"Voted over {frames} extra frames: value {value}, suit {suit}"
+          + (f" ({', '.join(unsettled)} unsettled)" if unsettled else ""))
+    card = build_card(value, suit, color)
+    if not isinstance(card, Card):
+        increment("recognition_failures")
+    recognition.record(card)
+    return card
+
+def start_card_recognition(screen, origin=(0, 0), use_cache=True, record_dataset=True):
+    """Start recognising the card in a captured frame without waiting for the result"""
+    return CardRecognition(screen, origin, use_cache, record_dataset)
+
+def recognize_card(screen=None, origin=(0, 0), use_cache=True, record_dataset=True):
+    """Identify the card, returning (card, timings); grabs only the card box if no screen is given
+
+    With record_dataset the crop also goes to the DATASET_DIR dataset, if one is set.
+    """
+    if screen is None:
+        screen = capture_card_region()
+        origin = CARD_BOX_TOP_LEFT
+    recognition = start_card_recognition(screen, origin, use_cache, record_dataset)
+    card, timings = recognition.result()
+    if not recognition.confident():
+        # Nothing votes on this card, so record the reading as it is
+        recognition.record(card)
+    return card, timings
+
+def identify_card(screen=None, origin=(0, 0), use_cache=True, record_dataset=True):
+    """Identify the card on screen (both value and suit), grabbing only the card box if no screen is given"""
+    card, timings = recognize_card(screen, origin, use_cache, record_dataset)
+    return card
@@ -0,0 +1,140 @@
+# Compact card encoding and bitmask deck model
+
+from config import *
+
+RANKS = sorted(CARD_VALUES.values())  # Numeric values 2..14 (Ace high)
+VALUE_NAMES = {numeric: name for name, numeric in CARD_VALUES.items()}
+FULL_MASK = (1 << CARDS_PER_DECK) - 1
+
+class Card:
+    """A card stored as a single integer 0..51 (suit-major: suit index * 13 + rank index)
+
+    Supports dict-style access (card['value'], card['suit'], card['numeric_value'],
+    card['color']) so it can be used wherever detection dicts were used before.
+    """
+
+    __slots__ = ('code',)
+
+    def __init__(self, code):
+        self.code = code
+
+    @staticmethod
+    def from_value(value, suit):
+        """Return the card for a value name ('2'..'A') and suit name"""
+        return ALL_CARDS[encode(CARD_VALUES[value], suit)]
+
+    @property
+    def numeric_value(self):
+        return RANKS[self.code % CARDS_PER_SUIT]
+
+    @property
+    def value(self):
+        return VALUE_NAMES[self.numeric_value]
+
+    @property
+    def suit_index(self):
+        return self.code // CARDS_PER_SUIT
+
+    @property
+    def suit(self):
+        return SUITS[self.suit_index]
+
+    @property
+    def color(self):
+        return 'red' if self.suit in RED_SUITS else 'black'
+
+    @property
+    def bit(self):
+        return 1 << self.code
+
+    def __getitem__(self, key):
+        if key not in ('value', 'suit', 'numeric_value', 'color'):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        return isinstance(other, Card) and self.code == other.code
+
+    def __lt__(self, other):
+        return self.code < other.code
+
+    def __hash__(self):
+        return self.code
+
+    def __repr__(self):
+        return f"{self.value} {self.suit}"
+
+def encode(numeric_value, suit):
+    """Encode a numeric value and suit name as a card code"""
+    return SUITS.index(suit) * CARDS_PER_SUIT + RANKS.index(numeric_value)
+
+ALL_CARDS = [Card(code) for code in range(CARDS_PER_DECK)]
+
+def cards_mask(predicate):
+    """Bitmask of every card satisfying predicate(card)"""
+    mask = 0
+    for card in ALL_CARDS:
+        if predicate(card):
+            mask |= card.bit
+    return mask
+
+# Precomputed masks for the questions the game asks
+SUIT_MASKS = {suit: cards_mask(lambda card, suit=suit: card.suit == suit) for suit in SUITS}
+RED_MASK = cards_mask(lambda card: card.suit in RED_SUITS)
+AT_LEAST_MASKS = {v: cards_mask(lambda card, v=v: card.numeric_value >= v) for v in RANKS}
+BELOW_MASKS = {v: cards_mask(lambda card, v=v: card.numeric_value < v) for v in RANKS}
+BETWEEN_MASKS = {(low, high): cards_mask(lambda card, low=low, high=high: low <= card.numeric_value <= high)
+                 for low in RANKS for high in RANKS if low <= high}
+
+class DeckModel:
+    """Tracks seen cards as a bitmask and counts remaining cards matching a mask by popcount
+
+    With a fresh deck per round every draw comes from the full deck, so seen cards
+    are still recorded but do not reduce what can be drawn.
+    """
+
+    __slots__ = ('fresh_deck', 'seen')
+
+    def __init__(self, fresh_deck=FRESH_DECK_PER_ROUND, seen=0):
+        self.fresh_deck = fresh_deck
+        self.seen = seen
+
+    @classmethod
+    def from_cards(cls, cards, fresh_deck=FRESH_DECK_PER_ROUND):
+        """Deck model with the given cards already seen"""
+        seen = 0
+        for card in cards:
+            seen |= card.bit
+        return cls(fresh_deck, seen)
+
+    def add(self, card):
+        """Record a seen card"""
+        self.seen |= card.bit
+
+    def reset(self):
+        """Forget every seen card"""
+        self.seen = 0
+
+    @property
+    def available(self):
+        """Bitmask of the cards the next draw can be"""
+        return FULL_MASK if self.fresh_deck else FULL_MASK & ~self.seen
+
+    def count(self, mask=FULL_MASK):
+        """How many drawable cards are in mask"""
+        return (self.available & mask).bit_count()
+
+    def probability(self, mask):
+        """Probability that the next card is in mask"""
+        return self.count(mask) / self.count()
+
+    def cards(self):
+        """The drawable cards, in code order"""
+        available = self.available
+        return [card for card in ALL_CARDS if available & card.bit]
@@ -6,9 +6,17 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATE_DIR = os.path.join(BASE_DIR, "Pictures")
 NUMBER_TEMPLATE_DIR = os.path.join(BASE_DIR, "Numbers")
+GLYPH_SAMPLE_DIR = os.path.join(BASE_DIR, "Glyphs")  # Extra captured value glyphs named <value>_<n>.png
 
 # Tesseract settings
 TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"  # Update with your path
+USE_TESSERACT_FALLBACK = True  # Run Tesseract when the glyph classifier is not confident
+
+# Glyph classifier settings (in-process card value recognition)
+GLYPH_SIZE = 16  # Glyphs are normalised to GLYPH_SIZE x GLYPH_SIZE before matching
+GLYPH_MATCH_THRESHOLD = 0.8  # Minimum correlation with a sample glyph
+GLYPH_MIN_MARGIN = 0.05  # Minimum correlation gap to the best sample of another value
+NUMBER_MATCH_THRESHOLD = 0.45  # Minimum TM_CCOEFF_NORMED score to accept a number template match
 
 # Card coordinates
 CARD_TOP_LEFT = (1176, 532)
@@ -22,12 +30,48 @@ OCR_BOTTOM_RIGHT = (1208, 579)
 SUIT_TOP_LEFT = (1176, 547)
 SUIT_BOTTOM_RIGHT = (1208, 613)
 
+# Suit matching thresholds (TM_CCOEFF_NORMED scores)
+SUIT_MATCH_THRESHOLD = 0.5  # Minimum score for the best suit
+SUIT_MIN_MARGIN = 0.0  # Minimum gap between the best and second-best suit
+
+# Recognition pipeline
+RECOGNITION_WORKERS = 2  # Worker threads shared by the value and suit recognition stages
+CARD_FRAME_BUFFERS = 4  # Card box frames kept in rotation; a captured frame stays valid for this many captures
+# Value readings scoring below the threshold of the method that read them are re-read and voted on
+VALUE_CONFIDENCE_THRESHOLDS = {
+    'glyph': GLYPH_MATCH_THRESHOLD,  # Glyph correlation
+    'tesseract': 0.8,  # Tesseract word confidence, scaled to 0-1
+    'template': 0.7,  # Number template TM_CCOEFF_NORMED score
+}
+SUIT_CONFIDENCE_THRESHOLD = SUIT_MATCH_THRESHOLD  # Suit readings scoring below this are re-read and voted on
+RECOGNITION_VOTE_FRAMES = 4  # Most extra card box grabs for a card that was not read confidently
+RECOGNITION_VOTE_BUDGET = 0.05  # Seconds allowed for the extra grabs and readings
+RECOGNITION_VOTE_INTERVAL = 0.005  # Seconds between extra grabs
+RECOGNITION_VOTE_QUORUM = 2  # Agreeing confident readings that settle an uncertain value or suit
+USE_ASYNC_RUNTIME = False  # Run the game loop on asyncio (async_runtime.py) instead of blocking calls
+
+# Recognition cache (recognised cards keyed by a hash of the card box)
+CARD_CACHE_SIZE = 256  # Maximum cached card faces (the game only has 52)
+CARD_CACHE_HASH_SIZE = (16, 32)  # (width, height) the card box is downsampled to before hashing
+CARD_CACHE_QUANTIZE_BITS = 4  # Low bits dropped from each channel before hashing
+CARD_CACHE_PERSIST = True  # Save the cache on exit and load it on startup
+CARD_CACHE_FILE = os.path.join(BASE_DIR, "card_cache.json")
+
+# Suit color classification (BGR ranges on the suit region)
+RED_INK_LOWER = (0, 0, 150)  # Red suit ink: strong red, little green
+RED_INK_UPPER = (255, 119, 255)
+BLACK_INK_LOWER = (0, 0, 0)  # Black suit ink: dark in every channel
+BLACK_INK_UPPER = (119, 119, 119)
+COLOR_MIN_INK_PIXELS = 30  # Minimum ink pixels before trusting the color
+COLOR_CONFIDENCE_THRESHOLD = 0.8  # Minimum confidence to restrict suit matching to one color
+
 # Button coordinates
 READY_BUTTON = (1280, 935)
 RED_HIGHER_INSIDE_HEARTS_BUTTON = (1280, 1024)
 BLACK_LOWER_OUTSIDE_CLUBS_BUTTON = (1280, 1085)
 DIAMONDS_BUTTON = (1280, 1143)
 SPADES_BUTTON = (1280, 1207)
+CASHOUT_BUTTON = None  # Set to the Cash Out button position to let the bot cash out when it pays
 
 # Game state detection
 OPTION_AVAILABLE_PIXEL = (1408, 1028)
@@ -36,10 +80,20 @@ OPTION_AVAILABLE_COLOR2 = (121, 42, 42)
 COLOR_TOLERANCE = 20  # RGB tolerance for color matching
 
 # Timeouts and retries
-CARD_WAIT_TIME = 1.5  # Fixed seconds to wait for card to appear
+CARD_WAIT_TIME = 1.5  # Maximum seconds to wait for card to appear
+CARD_POLL_INTERVAL = 0.02  # Time between card region grabs while waiting for a card
+CARD_STABLE_FRAMES = 3  # Consecutive unchanged frames before a new card counts as settled
+CARD_CHANGE_THRESHOLD = 30  # Mean pixel difference (sum of BGR) that counts as a new card
+CARD_STABLE_THRESHOLD = 6  # Mean pixel difference (sum of BGR) still treated as unchanged
 MAX_OPTION_WAIT_TIME = 15  # Maximum seconds to wait for options to be available
 MAX_READY_ATTEMPTS = 20  # Maximum number of attempts to click Ready button
+READY_RECLICK_INTERVAL = 1.0  # Seconds to wait for options after a Ready click before clicking again
 CHECK_INTERVAL = 0.1  # Time between checks when polling for state changes
+OPTION_POLL_MIN_INTERVAL = 0.01  # Fastest option pixel poll, used right after an action
+OPTION_POLL_MAX_INTERVAL = 0.25  # Slowest option pixel poll when idle
+OPTION_POLL_BACKOFF = 1.5  # Poll interval multiplier after each unchanged sample
+GAME_WINDOW_TITLE = "Schedule I"  # Start as soon as the active window's title contains this
+GAME_WINDOW_TIMEOUT = 30  # Seconds to wait for the game window before starting anyway
 
 # Card values (2-10, J, Q, K, A)
 CARD_VALUES = {
@@ -50,13 +104,73 @@ CARD_VALUES = {
 # Game settings
 INITIAL_BALANCE = 0  # Starting balance
 BET_AMOUNT = 500  # Amount lost on a loss
-WIN_AMOUNT = 10000  # Amount won on completing all rounds
+WIN_AMOUNT = 10000  # Payout for completing all rounds (20x the bet, the bet included)
 
 # Card counting
 CARDS_PER_DECK = 52
 CARDS_PER_SUIT = 13
+FRESH_DECK_PER_ROUND = True  # Each round is dealt from a fresh deck (False: dealt cards leave the deck)
 
 # Suits
 SUITS = ["Diamonds", "Hearts", "Clubs", "Spades"]
 RED_SUITS = ["Diamonds", "Hearts"]
 BLACK_SUITS = ["Clubs", "Spades"]
+
+# Cashing out (net gain is the bet times the multiplier, minus the bet itself)
+CASHOUT_MULTIPLIERS = {1: 2, 2: 3, 3: 4}  # Bet multiplier paid when cashing out after winning round N
+
+# Offline replay (replay.py)
+REPLAY_FPS = 30  # Frame rate assumed for replayed frames when advancing with the virtual clock
+REPLAY_DECODE_CACHE = 8  # Decoded replay frames kept in memory
+
+# Instrumentation (instrumentation.py)
+HISTOGRAM_SUB_BUCKET_BITS = 7  # Latency histogram precision (7 bits: under 1.6% relative error)
+STATS_DUMP_INTERVAL = 300  # Seconds between latency reports while running (0 or None: only on exit)
+
+# Background writer (debug images, dataset records and console output)
+WRITER_QUEUE_SIZE = 256  # Pending writes before new ones are dropped
+WRITER_SAMPLE_EVERY = 4  # Keep one debug image in this many once the queue is half full
+WRITER_FLUSH_TIMEOUT = 5.0  # Seconds to wait for pending writes on exit
+
+# Labelled card dataset (dataset.py)
+DATASET_DIR = None  # Directory to record every recognised card crop and its label into (None: off)
+GLYPH_SAMPLES_PER_VALUE = 3  # Most distinct value crops `dataset.py glyphs` exports per value
+
+# Game journal (journal.py)
+JOURNAL_FILE = os.path.join(BASE_DIR, "games.journal")  # Append-only binary record of every game (None: off)
+JOURNAL_BATCH_SIZE = 64  # Games buffered in memory between appends
+
+# Metrics endpoint (metrics.py)
+METRICS_PORT = None  # Serve Prometheus metrics on http://METRICS_HOST:METRICS_PORT/metrics (None: off)
+METRICS_HOST = "127.0.0.1"  # Interface to listen on ("0.0.0.0" to let other machines scrape)
+METRICS_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Seconds
+
+# Screen layout
+# The coordinates above are for the reference 2560x1440 layout on MONITOR_INDEX. calibration.py
+# locates the card on the current monitor and writes LAYOUT_FILE with every point scaled to it;
+# when that file exists it replaces the reference coordinates here, so `from config import *`
+# always sees the calibrated layout.
+MONITOR_INDEX = 1  # mss monitor number (1 is the primary monitor)
+MONITOR_ORIGIN = (0, 0)  # Top-left of the monitor on the virtual desktop, added to clicks
+REFERENCE_RESOLUTION = (2560, 1440)
+LAYOUT_FILE = os.path.join(BASE_DIR, "layout.json")
+LAYOUT_SCALE = 1.0  # Size of the calibrated layout relative to the reference layout
+LAYOUT_POINTS = [
+    "CARD_TOP_LEFT", "CARD_TOP_RIGHT", "OCR_TOP_LEFT", "OCR_BOTTOM_RIGHT", "SUIT_TOP_LEFT", "SUIT_BOTTOM_RIGHT",
+    "READY_BUTTON", "RED_HIGHER_INSIDE_HEARTS_BUTTON", "BLACK_LOWER_OUTSIDE_CLUBS_BUTTON", "DIAMONDS_BUTTON",
+    "SPADES_BUTTON", "CASHOUT_BUTTON", "OPTION_AVAILABLE_PIXEL",
+]
+REFERENCE_LAYOUT = {name: globals()[name] for name in LAYOUT_POINTS}
+REFERENCE_COLOR_MIN_INK_PIXELS = COLOR_MIN_INK_PIXELS
+
+if os.path.exists(LAYOUT_FILE):
+    import json as _json
+    with open(LAYOUT_FILE) as _layout_file:
+        _layout = _json.load(_layout_file)
+    MONITOR_INDEX = _layout['monitor']
+    MONITOR_ORIGIN = tuple(_layout['origin'])
+    LAYOUT_SCALE = _layout['scale']
+    for _name, _point in _layout['points'].items():
+        globals()[_name] = tuple(_point) if _point is not None else None
+    # Ink pixel counts scale with the area of the suit region
+    COLOR_MIN_INK_PIXELS = max(1, round(REFERENCE_COLOR_MIN_INK_PIXELS * LAYOUT_SCALE ** 2))
@@ -0,0 +1,265 @@
+# Labelled card-crop dataset: capture while the bot runs, and an accuracy/latency benchmark
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from config import *
+from screen_capture import CARD_BOX_TOP_LEFT, CARD_BOX_BOTTOM_RIGHT
+from background_writer import get_background_writer
+
+# A dataset directory holds:
+#   meta.json    crop shape and dtype
+#   crops.u8     every card box crop back to back (memory-mapped as an N x H x W x 3 array)
+#   index.jsonl  one {"value", "suit", "time", "source"} record per crop, in the same order
+META_FILE = "meta.json"
+CROPS_FILE = "crops.u8"
+INDEX_FILE = "index.jsonl"
+
+CARD_BOX_SHAPE = (CARD_BOX_BOTTOM_RIGHT[1] - CARD_BOX_TOP_LEFT[1],
+                  CARD_BOX_BOTTOM_RIGHT[0] - CARD_BOX_TOP_LEFT[0], 3)
+
+class DatasetWriter:
+    """Appends card box crops and their labels to a dataset directory"""
+
+    def __init__(self, directory, shape=CARD_BOX_SHAPE):
+        self.directory = directory
+        self.shape = tuple(shape)
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                existing = tuple(json.load(f)['shape'])
+            if existing != self.shape:
+                raise ValueError(f"Dataset {directory} holds {existing} crops, not {self.shape}")
+        else:
+            with open(meta_path, "w") as f:
+                json.dump({'shape': self.shape, 'dtype': 'uint8'}, f)
+
+        self.crops_file = open(os.path.join(directory, CROPS_FILE), "ab")
+        self.index_file = open(os.path.join(directory, INDEX_FILE), "a")
+
+    def add(self, crop, card, source="live"):
+        """Record one crop with the card recognised in it (None or partial cards keep their missing fields)"""
+        if crop.shape != self.shape:
+            print(f"Warning: Skipping dataset crop of shape {crop.shape}, expected {self.shape}")
+            return
+        record = {
+            'value': card['value'] if card else None,
+            'suit': card['suit'] if card else None,
+            'time': datetime.now().isoformat(),
+            'source': source,
+        }
+        data = np.ascontiguousarray(crop, dtype=np.uint8).tobytes()
+        line = json.dumps(record) + "\n"
+
+        def write():
+            # Crop and index line are written together, so a dropped record never misaligns the two
+            with self.lock:
+                self.crops_file.write(data)
+                self.index_file.write(line)
+                self.crops_file.flush()
+                self.index_file.flush()
+
+        get_background_writer().submit(write)
+
+    def close(self):
+        get_background_writer().flush()
+        with self.lock:
+            self.crops_file.close()
+            self.index_file.close()
+
+def load_dataset(directory):
+    """Return (crops, labels): a read-only memory-mapped N x H x W x 3 array and the index records"""
+    with open(os.path.join(directory, META_FILE)) as f:
+        shape = tuple(json.load(f)['shape'])
+    with open(os.path.join(directory, INDEX_FILE)) as f:
+        labels = [json.loads(line) for line in f if line.strip()]
+
+    crops_path = os.path.join(directory, CROPS_FILE)
+    crop_size = int(np.prod(shape))
+    # A crash can leave a crop without its index line (or vice versa); use the complete pairs
+    count = min(len(labels), os.path.getsize(crops_path) // crop_size)
+    if count == 0:
+        return np.zeros((0,) + shape, dtype=np.uint8), []
+    crops = np.memmap(crops_path, dtype=np.uint8, mode='r', shape=(count,) + shape)
+    return crops, labels[:count]
+
+_writer = None
+
+def get_dataset_writer():
+    """Return the shared writer for DATASET_DIR, or None if dataset capture is disabled"""
+    global _writer
+    if _writer is None and DATASET_DIR:
+        _writer = DatasetWriter(DATASET_DIR)
+    return _writer
+
+def percentiles(samples_ns):
+    """p50/p95/p99 of nanosecond samples, in milliseconds"""
+    if not samples_ns:
+        return (0.0, 0.0, 0.0)
+    return tuple(np.percentile(np.array(samples_ns) / 1e6, [50, 95, 99]))
+
+def print_confusion(title, labels, truth, predicted):
+    """Print a confusion matrix with true labels as rows and predictions (plus None) as columns"""
+    columns = labels + [None]
+    matrix = np.zeros((len(labels), len(columns)), dtype=int)
+    for actual, guess in zip(truth, predicted):
+        if actual in labels:
+            matrix[labels.index(actual), columns.index(guess if guess in labels else None)] += 1
+
+    names = [str(label) if label is not None else '-' for label in columns]
+    width = max(5, max(len(name) for name in names) + 1)
+    print(title)
+    print(" " * width + "".join(name.rjust(width) for name in names))
+    for label, row in zip(labels, matrix):
+        if row.sum():
+            print(str(label).rjust(width) + "".join(str(n).rjust(width) for n in row))
+
+def run_stage(func, crops, indices):
+    """Call func(crop) for the given crops, returning (results, nanosecond latencies)"""
+    results = []
+    latencies = []
+    # The recognition functions print warnings on failure; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in indices:
+            crop = np.array(crops[i])  # Page the crop in before timing
+            start = time.perf_counter_ns()
+            results.append(func(crop))
+            latencies.append(time.perf_counter_ns() - start)
+        # Warnings are printed on the background writer; let them land here too
+        get_background_writer().flush()
+    return results, latencies
+
+def report_stage(name, truth, predicted, latencies):
+    """Print accuracy and latency percentiles for one stage"""
+    correct = sum(actual == guess for actual, guess in zip(truth, predicted))
+    p50, p95, p99 = percentiles(latencies)
+    accuracy = correct / len(truth) * 100 if truth else 0.0
+    print(f"{name}: {correct}/{len(truth)} correct ({accuracy:.1f}%), "
+          f"p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms")
+
+def benchmark(directory, limit=None):
+    """Run the value, suit and full-card recognisers over a dataset and report accuracy and latency"""
+    from card_detection import detect_card_value, detect_card_suit, identify_card
+
+    crops, labels = load_dataset(directory)
+    count = len(labels) if limit is None else min(limit, len(labels))
+    print(f"Benchmarking {count} crops from {directory}")
+    origin = CARD_BOX_TOP_LEFT
+
+    value_indices = [i for i in range(count) if labels[i]['value']]
+    values, value_times = run_stage(lambda crop: detect_card_value(crop, origin), crops, value_indices)
+    value_truth = [labels[i]['value'] for i in value_indices]
+
+    suit_indices = [i for i in range(count) if labels[i]['suit']]
+    suits, suit_times = run_stage(lambda crop: detect_card_suit(crop, origin), crops, suit_indices)
+    suit_truth = [labels[i]['suit'] for i in suit_indices]
+
+    card_indices = [i for i in range(count) if labels[i]['value'] and labels[i]['suit']]
+    cards, card_times = run_stage(lambda crop: identify_card(crop, origin, use_cache=False, record_dataset=False), crops, card_indices)
+    card_truth = [(labels[i]['value'], labels[i]['suit']) for i in card_indices]
+    card_predicted = [(card['value'], card['suit']) if card else (None, None) for card in cards]
+
+    report_stage("detect_card_value", value_truth, values, value_times)
+    report_stage("detect_card_suit", suit_truth, suits, suit_times)
+    report_stage("identify_card", card_truth, card_predicted, card_times)
+    print()
+    print_confusion("Value confusion (rows: label, columns: detected)", list(CARD_VALUES), value_truth, values)
+    print()
+    print_confusion("Suit confusion (rows: label, columns: detected)", SUITS, suit_truth, suits)
+
+def capture_frames(path, directory):
+    """Recognise every frame of a recording (see replay.py) and add the crops to a dataset"""
+    from replay import open_frames, frame_origin
+    from card_detection import crop_region, identify_card
+
+    frames = open_frames(path)
+    writer = DatasetWriter(directory)
+    for index in range(len(frames)):
+        frame = frames[index]
+        origin = frame_origin(frame)
+        card = identify_card(frame, origin, use_cache=False, record_dataset=False)
+        writer.add(crop_region(frame, CARD_BOX_TOP_LEFT, CARD_BOX_BOTTOM_RIGHT, origin), card, source=path)
+    writer.close()
+    print(f"Added {len(frames)} crops to {directory}")
+
+def export_glyphs(directory, output=GLYPH_SAMPLE_DIR, per_value=GLYPH_SAMPLES_PER_VALUE):
+    """Save the value region of labelled crops as glyph classifier samples (<value>_<n>.png in output)
+
+    Values that already have per_value samples in output are skipped, as are exact duplicates.
+    """
+    import cv2
+
+    crops, labels = load_dataset(directory)
+    os.makedirs(output, exist_ok=True)
+    counts = {}
+    next_index = {}
+    seen = set()
+    for name in os.listdir(output):
+        parts = name.split('.')[0].split('_')
+        if not name.endswith('.png') or len(parts) != 2 or parts[0] not in CARD_VALUES or not parts[1].isdigit():
+            continue
+        value = parts[0]
+        counts[value] = counts.get(value, 0) + 1
+        next_index[value] = max(next_index.get(value, 0), int(parts[1]) + 1)
+        image = cv2.imread(os.path.join(output, name))
+        if image is not None:
+            seen.add((value, image.tobytes()))
+
+    (x1, y1), (x2, y2) = OCR_TOP_LEFT, OCR_BOTTOM_RIGHT
+    ox, oy = CARD_BOX_TOP_LEFT
+    added = 0
+    for crop, label in zip(crops, labels):
+        value = label['value']
+        if value not in CARD_VALUES or counts.get(value, 0) >= per_value:
+            continue
+        glyph = np.ascontiguousarray(crop[y1 - oy:y2 - oy, x1 - ox:x2 - ox])
+        key = (value, glyph.tobytes())
+        if key in seen:
+            continue
+        seen.add(key)
+        index = next_index.get(value, 0)
+        cv2.imwrite(os.path.join(output, f"{value}_{index}.png"), glyph)
+        next_index[value] = index + 1
+        counts[value] = counts.get(value, 0) + 1
+        added += 1
+
+    print(f"Added {added} glyph samples to {output}")
+    missing = [value for value in CARD_VALUES if not counts.get(value)]
+    if missing:
+        print(f"Still no samples for {', '.join(missing)}")
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Card crop dataset tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("benchmark", help="Report recognition accuracy and latency on a dataset")
+    bench.add_argument("directory")
+    bench.add_argument("--limit", type=int, default=None, help="Only use the first N crops")
+    capture = commands.add_parser("capture", help="Label the frames of a recording and add them to a dataset")
+    capture.add_argument("recording", help="Directory of screenshots, .npy frame stack or video file")
+    capture.add_argument("directory")
+    glyphs = commands.add_parser("glyphs", help="Export labelled value crops as glyph classifier samples")
+    glyphs.add_argument("directory")
+    glyphs.add_argument("--output", default=GLYPH_SAMPLE_DIR, help="Glyph sample directory")
+    glyphs.add_argument("--per-value", type=int, default=GLYPH_SAMPLES_PER_VALUE,
+                        help="Most samples to keep per value")
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        benchmark(args.directory, args.limit)
+    elif args.command == "glyphs":
+        export_glyphs(args.directory, args.output, args.per_value)
+    else:
+        capture_frames(args.recording, args.directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Precomputed decision tables for every round choice
+
+from itertools import combinations_with_replacement
+from config import *
+from cards import (Card, DeckModel, RANKS, VALUE_NAMES, FULL_MASK, SUIT_MASKS, AT_LEAST_MASKS, BELOW_MASKS,
+                   BETWEEN_MASKS)
+
+def suit_counts(cards):
+    """Count the known suits among cards, as a tuple in SUITS order"""
+    counts = [0] * len(SUITS)
+    for card in cards:
+        if card['suit'] in SUITS:
+            counts[SUITS.index(card['suit'])] += 1
+    return tuple(counts)
+
+def best_option(options, seen_cards, fresh_deck):
+    """Pick the option whose mask holds the most drawable cards
+
+    Ties under the deck rule are broken by the odds with seen cards removed, then by option order.
+    """
+    deck = DeckModel.from_cards(seen_cards, fresh_deck)
+    shared_deck = DeckModel.from_cards(seen_cards, fresh_deck=False)
+    return max(options, key=lambda option: (deck.count(options[option]), shared_deck.count(options[option])))
+
+def round2_choice(value, fresh_deck=FRESH_DECK_PER_ROUND):
+    """Best higher/lower choice against a first card value (ties go to higher)"""
+    # Higher is inclusive, lower is exclusive
+    options = {"higher": AT_LEAST_MASKS[value], "lower": BELOW_MASKS[value]}
+    seen_cards = [Card.from_value(VALUE_NAMES[value], SUITS[0])]
+    return best_option(options, seen_cards, fresh_deck)
+
+def round3_choice(low_val, high_val, fresh_deck=FRESH_DECK_PER_ROUND):
+    """Best inside/outside choice for two boundary values (ties go to inside)"""
+    # Inside includes cards equal to boundary cards, outside excludes them
+    inside = BETWEEN_MASKS[(low_val, high_val)]
+    options = {"inside": inside, "outside": FULL_MASK & ~inside}
+    seen_cards = [Card.from_value(VALUE_NAMES[low_val], SUITS[0]), Card.from_value(VALUE_NAMES[high_val], SUITS[1])]
+    return best_option(options, seen_cards, fresh_deck)
+
+def round4_choice(counts, fresh_deck=FRESH_DECK_PER_ROUND):
+    """Best suit given how many of each suit have been seen (ties go to the first suit in SUITS)"""
+    options = {suit: SUIT_MASKS[suit] for suit in SUITS}
+    # Any cards with the same suits stand for the whole history
+    seen_suits = [SUITS[index] for index, count in enumerate(counts) for _ in range(count)]
+    seen_cards = [Card.from_value(VALUE_NAMES[RANKS[n]], suit) for n, suit in enumerate(seen_suits)]
+    return best_option(options, seen_cards, fresh_deck)
+
+class DecisionEngine:
+    """Lookup tables for every round 2 card, round 3 pair and round 4 suit history"""
+
+    def __init__(self, fresh_deck=FRESH_DECK_PER_ROUND):
+        self.fresh_deck = fresh_deck
+
+        # {first card value: "higher" | "lower"}
+        self.round2 = {value: round2_choice(value, fresh_deck) for value in RANKS}
+
+        # {(low value, high value): "inside" | "outside"}
+        self.round3 = {(low, high): round3_choice(low, high, fresh_deck)
+                       for low, high in combinations_with_replacement(RANKS, 2)}
+
+        # {suit counts in SUITS order: suit}, for every history of up to three known suits
+        self.round4 = {}
+        for seen in range(4):
+            for history in combinations_with_replacement(range(len(SUITS)), seen):
+                counts = tuple(history.count(index) for index in range(len(SUITS)))
+                self.round4[counts] = round4_choice(counts, fresh_deck)
+
+    def round2_choice(self, value):
+        """Higher or lower for the first card value"""
+        return self.round2[value]
+
+    def round3_choice(self, value1, value2):
+        """Inside or outside for the first two card values, in either order"""
+        return self.round3[(min(value1, value2), max(value1, value2))]
+
+    def round4_choice(self, cards):
+        """Suit to bet on given the cards seen so far"""
+        return self.round4[suit_counts(cards)]
+
+_engine = None
+
+def get_decision_engine():
+    """Return the shared decision engine, building its tables on first use"""
+    global _engine
+    if _engine is None:
+        _engine = DecisionEngine()
+    return _engine
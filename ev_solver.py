@@ -0,0 +1,93 @@
+# Exact expected-value solver for continuing vs cashing out
+
+from config import *
+from cards import DeckModel, SUIT_MASKS
+from decision_engine import get_decision_engine, suit_counts
+
+# Every payout is counted net of the bet, which is part of what the game pays out
+NET_WIN_AMOUNT = WIN_AMOUNT - BET_AMOUNT  # Net amount credited for winning round 4
+
+def cashout_amount(round_won):
+    """Net amount credited when cashing out after winning round_won (the bet is part of the payout)"""
+    return BET_AMOUNT * (CASHOUT_MULTIPLIERS[round_won] - 1)
+
+class EVSolver:
+    """Expected value of every reachable game state by exact enumeration of the remaining deck
+
+    Choices come from the decision tables; the solver adds the optimal cash-out policy on top.
+    States are memoized, so the whole tree is solved once and then answered by lookup.
+    Cards are cards.Card objects and draws follow the configured deck rule (FRESH_DECK_PER_ROUND).
+    """
+
+    def __init__(self, fresh_deck=FRESH_DECK_PER_ROUND):
+        self.fresh_deck = fresh_deck
+        self.decisions = get_decision_engine()
+        self.continue_values = {}  # {sorted cards: EV of playing the next round}
+        self.round4_values = {}  # {suit counts: EV of playing round 4}
+        self.value = self.continue_value(())
+
+    def wins_round(self, cards, card):
+        """Whether card wins the next round given the cards seen before it"""
+        round_number = len(cards) + 1
+        value = card.numeric_value
+        if round_number == 1:
+            return card.suit in RED_SUITS  # We always bet on red
+        if round_number == 2:
+            first = cards[0].numeric_value
+            if self.decisions.round2_choice(first) == "higher":
+                return value >= first
+            return value < first
+        if round_number == 3:
+            low_val = min(cards[0].numeric_value, cards[1].numeric_value)
+            high_val = max(cards[0].numeric_value, cards[1].numeric_value)
+            if self.decisions.round3_choice(low_val, high_val) == "inside":
+                return low_val <= value <= high_val
+            return value < low_val or value > high_val
+        return card.suit == self.decisions.round4_choice(cards)
+
+    def after_win_value(self, cards):
+        """EV right after winning round len(cards), taking the better of cashing out and continuing"""
+        round_won = len(cards)
+        if round_won == 4:
+            return NET_WIN_AMOUNT
+        return max(cashout_amount(round_won), self.continue_value(cards))
+
+    def continue_value(self, cards):
+        """EV of playing the next round from the given cards and then acting optimally"""
+        if len(cards) == 3:
+            # Round 4 only depends on how many of each suit have been seen
+            counts = suit_counts(cards)
+            if counts not in self.round4_values:
+                chosen = self.decisions.round4[counts]
+                deck = DeckModel.from_cards(cards, self.fresh_deck)
+                win_prob = deck.probability(SUIT_MASKS[chosen])
+                self.round4_values[counts] = win_prob * NET_WIN_AMOUNT - (1 - win_prob) * BET_AMOUNT
+            return self.round4_values[counts]
+
+        key = tuple(sorted(cards))
+        if key not in self.continue_values:
+            remaining = DeckModel.from_cards(cards, self.fresh_deck).cards()
+            total = 0.0
+            for card in remaining:
+                if self.wins_round(cards, card):
+                    total += self.after_win_value(cards + (card,))
+                else:
+                    total -= BET_AMOUNT
+            self.continue_values[key] = total / len(remaining)
+        return self.continue_values[key]
+
+    def should_cash_out(self, cards):
+        """Whether cashing out beats continuing right after winning round len(cards)"""
+        round_won = len(cards)
+        if round_won not in CASHOUT_MULTIPLIERS:
+            return False
+        return cashout_amount(round_won) > self.continue_value(tuple(cards))
+
+_solver = None
+
+def get_ev_solver():
+    """Return the shared solver, solving the full game tree on first use"""
+    global _solver
+    if _solver is None:
+        _solver = EVSolver()
+    return _solver
@@ -1,8 +1,16 @@
 # Game logic for Ride The Bus
 
-import random
 from config import *
-from colorama import Fore, Style
+from decision_engine import get_decision_engine
+from ev_solver import get_ev_solver, cashout_amount, NET_WIN_AMOUNT
+from cards import Card
+from instrumentation import timed
+from background_writer import write_line
+
+def colored(text, color):
+    """Wrap text in a colorama color (colorama is only imported once something is printed)"""
+    from colorama import Fore, Style
+    return f"{getattr(Fore, color)}{text}{Style.RESET_ALL}"
 
 class GameState:
     def __init__(self):
@@ -13,14 +21,18 @@ class GameState:
         self.total_games = 0
         self.wins = 0
         self.losses = 0
+        self.cashouts = 0
+        self.decisions = get_decision_engine()  # Precomputed choice tables
+        self.solver = get_ev_solver()  # Solved game tree for cash-out decisions
+        self.choices = {}  # Choice made in each round, so scoring uses what was clicked
         self.current_suit_choice = None  # Store the current suit choice
-        self.current_suit_choice = None  # Store the current suit choice
+        self.last_game = None  # Summary of the last scored game, until taken by finished_game()
     
     def reset_round(self):
         """Reset the current round cards"""
         self.round = 1
         self.current_round_cards = []
-        self.current_suit_choice = None  # Reset the suit choice
+        self.choices = {}  # Reset the recorded choices
         self.current_suit_choice = None  # Reset the suit choice
     
     def format_cards_string(self):
@@ -32,6 +44,8 @@ class GameState:
         for card in self.current_round_cards:
             if card['value'] and card['suit']:
                 card_strings.append(f"{card['value']} {card['suit']}")
+            elif card.get('color'):
+                card_strings.append(f"{card['color'].capitalize()} card")
             else:
                 card_strings.append("Unknown card")
                 
@@ -42,26 +56,47 @@ class GameState:
         if card:
             self.current_round_cards.append(card)
         else:
-            print("OCR failed to detect card!")
+            write_line("OCR failed to detect card!")
             self.current_round_cards.append({'value': '?', 'suit': '?', 'numeric_value': None})
     
+    def print_balance(self):
+        """Display balance with color (printed by the background writer)"""
+        if self.balance > 0:
+            write_line(colored(f"Balance: ${self.balance}", "GREEN"))
+        elif self.balance < 0:
+            write_line(colored(f"Balance: ${self.balance}", "RED"))
+        else:
+            write_line(f"Balance: ${self.balance}")
+    
+    def record_game(self, outcome, rounds_won, payout):
+        """Keep a summary of the game being scored, before its cards and choices are reset"""
+        choices = dict(self.choices)
+        if self.current_round_cards:
+            choices[1] = "red"  # Round 1 always bets red
+        self.last_game = {
+            'cards': list(self.current_round_cards),
+            'choices': choices,
+            'outcome': outcome,
+            'rounds_won': rounds_won,
+            'payout': payout,
+        }
+    
+    def finished_game(self):
+        """Return and clear the summary of the last scored game (None if none since the last call)"""
+        game, self.last_game = self.last_game, None
+        return game
+    
     def update_balance(self, won):
         """Update balance based on win or loss"""
         cards_str = self.format_cards_string()
         
         if won:
             if self.round == 4:
-                self.balance += WIN_AMOUNT
+                self.balance += NET_WIN_AMOUNT
                 self.wins += 1
-                print(f"{cards_str} --- {Fore.GREEN}Won{Style.RESET_ALL}")
-                
-                # Display balance with color
-                if self.balance > 0:
-                    print(f"{Fore.GREEN}Balance: ${self.balance}{Style.RESET_ALL}")
-                elif self.balance < 0:
-                    print(f"{Fore.RED}Balance: ${self.balance}{Style.RESET_ALL}")
-                else:
-                    print(f"Balance: ${self.balance}")
+                self.record_game("won", 4, NET_WIN_AMOUNT)
+                write_line(f"{cards_str} --- {colored('Won', 'GREEN')}")
+                self.print_balance()
                     
                 self.reset_round()
                 self.total_games += 1
@@ -71,17 +106,53 @@ class GameState:
         else:
             self.balance -= BET_AMOUNT
             self.losses += 1
-            print(f"{cards_str} --- {Fore.RED}Lost{Style.RESET_ALL}")
-            
-            # Display balance with color
-            if self.balance > 0:
-                print(f"{Fore.GREEN}Balance: ${self.balance}{Style.RESET_ALL}")
-            elif self.balance < 0:
-                print(f"{Fore.RED}Balance: ${self.balance}{Style.RESET_ALL}")
-            else:
-                print(f"Balance: ${self.balance}")
+            self.record_game("lost", self.round - 1, -BET_AMOUNT)
+            write_line(f"{cards_str} --- {colored('Lost', 'RED')}")
+            self.print_balance()
                 
             self.reset_round()
+            self.total_games += 1
+    
+    def known_cards(self):
+        """Return the current round cards as Card objects, or None if any is incomplete"""
+        cards = []
+        for card in self.current_round_cards:
+            if isinstance(card, Card):
+                cards.append(card)
+            elif card['value'] in CARD_VALUES and card['suit'] in SUITS:
+                cards.append(Card.from_value(card['value'], card['suit']))
+            else:
+                return None
+        return tuple(cards)
+    
+    def continue_value(self):
+        """Expected value of playing the next round instead of cashing out"""
+        cards = self.known_cards()
+        if cards is None:
+            return None
+        return self.solver.continue_value(cards)
+    
+    @timed("decision")
+    def should_cash_out(self):
+        """Whether cashing out now beats the expected value of continuing"""
+        round_won = self.round - 1
+        cards = self.known_cards()
+        if round_won not in CASHOUT_MULTIPLIERS or cards is None or len(cards) != round_won:
+            return False
+        return self.solver.should_cash_out(cards)
+    
+    def cash_out(self):
+        """Take the cash-out payout for the last round won and end the game"""
+        round_won = self.round - 1
+        amount = cashout_amount(round_won)
+        self.balance += amount
+        self.cashouts += 1
+        self.record_game("cashed_out", round_won, amount)
+        write_line(f"{self.format_cards_string()} --- {colored(f'Cashed out ${amount} after round {round_won}', 'YELLOW')}")
+        self.print_balance()
+        
+        self.reset_round()
+        self.total_games += 1
     
     def determine_round1_winner(self):
         """Determine if we won round 1 (Red or Black)"""
@@ -89,43 +160,27 @@ class GameState:
             return False
         
         card = self.current_round_cards[0]
-        if not card['suit']:
+        if card['suit']:
+            is_red = card['suit'] in RED_SUITS
+        elif card.get('color'):
+            # Color alone is enough to resolve round 1
+            is_red = card['color'] == 'red'
+        else:
             return False
-            
-        is_red = card['suit'] in RED_SUITS
         
         # We always bet on red
         return is_red
     
+    @timed("decision")
     def determine_round2_choice(self):
         """Determine whether to bet higher or lower for round 2"""
-        if not self.current_round_cards:
-            return "higher"  # Default if no card detected
-        
-        card1 = self.current_round_cards[0]
-        value1 = card1['numeric_value']
-        
-        # Calculate probabilities for higher (inclusive) and lower (exclusive)
-        remaining_cards = CARDS_PER_DECK - 1
-        
-        # Cards higher than or equal to the current card
-        higher_count = sum(1 for v in CARD_VALUES.values() if v >= value1) * 4
-        # Remove the one we've seen
-        higher_count -= 1
-        
-        # Cards lower than the current card
-        lower_count = sum(1 for v in CARD_VALUES.values() if v < value1) * 4
-        
-        higher_prob = higher_count / remaining_cards
-        lower_prob = lower_count / remaining_cards
-        
-        if higher_prob > lower_prob:
-            return "higher"
-        elif lower_prob > higher_prob:
-            return "lower"
+        if not self.current_round_cards or self.current_round_cards[0]['numeric_value'] is None:
+            choice = "higher"  # Default if no card detected
         else:
-            # In case of equal odds, choose randomly
-            return random.choice(["higher", "lower"])
+            choice = self.decisions.round2_choice(self.current_round_cards[0]['numeric_value'])
+        
+        self.choices[2] = choice
+        return choice
     
     def determine_round2_winner(self):
         """Determine if we won round 2 (Higher or Lower)"""
@@ -137,62 +192,32 @@ class GameState:
         
         if card1['numeric_value'] is None or card2['numeric_value'] is None:
             return False
-            
-        choice = self.determine_round2_choice()
+        
+        # Score the choice that was actually made
+        choice = self.choices.get(2) or self.determine_round2_choice()
         
         if choice == "higher":
-            result = card2['numeric_value'] >= card1['numeric_value']
-            return result
+            return card2['numeric_value'] >= card1['numeric_value']
         else:
-            result = card2['numeric_value'] < card1['numeric_value']
-            return result
+            return card2['numeric_value'] < card1['numeric_value']
     
+    @timed("decision")
     def determine_round3_choice(self):
         """Determine whether to bet inside or outside for round 3"""
         if len(self.current_round_cards) < 2:
-            return "inside"  # Default if not enough cards
-        
-        card1 = self.current_round_cards[0]
-        card2 = self.current_round_cards[1]
-        
-        # Ensure we have valid numeric values
-        if card1['numeric_value'] is None or card2['numeric_value'] is None:
-            return "inside"  # Default if missing values
-        
-        # Ensure lower value is first
-        if card1['numeric_value'] > card2['numeric_value']:
-            low_card, high_card = card2, card1
+            choice = "inside"  # Default if not enough cards
         else:
-            low_card, high_card = card1, card2
-        
-        low_val = low_card['numeric_value']
-        high_val = high_card['numeric_value']
-        
-        # Calculate probabilities
-        remaining_cards = CARDS_PER_DECK - 2
-        
-        # Cards inside (inclusive)
-        # Inside includes cards equal to boundary cards
-        inside_range = list(range(low_val, high_val + 1))
-        inside_count = len(inside_range) * 4
-        
-        # Subtract the two boundary cards we've seen
-        inside_count -= 2
-        
-        # Cards outside (exclusive)
-        # Outside excludes boundary cards
-        outside_count = remaining_cards - inside_count
-        
-        inside_prob = inside_count / remaining_cards
-        outside_prob = outside_count / remaining_cards
+            card1 = self.current_round_cards[0]
+            card2 = self.current_round_cards[1]
+            
+            # Ensure we have valid numeric values
+            if card1['numeric_value'] is None or card2['numeric_value'] is None:
+                choice = "inside"  # Default if missing values
+            else:
+                choice = self.decisions.round3_choice(card1['numeric_value'], card2['numeric_value'])
         
-        if inside_prob > outside_prob:
-            return "inside"
-        elif outside_prob > inside_prob:
-            return "outside"
-        else:
-            # In case of equal odds, choose randomly
-            return random.choice(["inside", "outside"])
+        self.choices[3] = choice
+        return choice
     
     def determine_round3_winner(self):
         """Determine if we won round 3 (Inside or Outside)"""
@@ -206,56 +231,26 @@ class GameState:
         if any(card['numeric_value'] is None for card in [card1, card2, card3]):
             return False
         
-        # Ensure lower value is first
-        if card1['numeric_value'] > card2['numeric_value']:
-            low_card, high_card = card2, card1
-        else:
-            low_card, high_card = card1, card2
-        
-        low_val = low_card['numeric_value']
-        high_val = high_card['numeric_value']
+        low_val = min(card1['numeric_value'], card2['numeric_value'])
+        high_val = max(card1['numeric_value'], card2['numeric_value'])
         
-        choice = self.determine_round3_choice()
+        # Score the choice that was actually made
+        choice = self.choices.get(3) or self.determine_round3_choice()
         
         if choice == "inside":
-            result = low_val <= card3['numeric_value'] <= high_val
-            return result
+            return low_val <= card3['numeric_value'] <= high_val
         else:
-            result = card3['numeric_value'] < low_val or card3['numeric_value'] > high_val
-            return result
+            return card3['numeric_value'] < low_val or card3['numeric_value'] > high_val
     
+    @timed("decision")
     def determine_round4_choice(self):
         """Determine which suit to bet on for round 4"""
-        if len(self.current_round_cards) < 3:
-            return random.choice(SUITS)  # Default if not enough cards
-        
         # Only consider the first 3 cards for suit selection
-        cards_to_consider = self.current_round_cards[:3]
-        
-        # Count seen cards by suit
-        seen_suits = {}
-        for suit in SUITS:
-            seen_suits[suit] = 0
-        
-        for card in cards_to_consider:
-            if card['suit']:
-                seen_suits[card['suit']] += 1
-        
-        # Calculate probabilities for each suit
-        remaining_cards = CARDS_PER_DECK - 3
-        probabilities = {}
-        
-        for suit in SUITS:
-            remaining_suit_cards = CARDS_PER_SUIT - seen_suits[suit]
-            probabilities[suit] = remaining_suit_cards / remaining_cards
-        
-        # Find the suit(s) with the highest probability
-        max_prob = max(probabilities.values())
-        best_suits = [suit for suit, prob in probabilities.items() if prob == max_prob]
+        suit = self.decisions.round4_choice(self.current_round_cards[:3])
         
-        # If multiple suits have the same probability, choose randomly
-        chosen_suit = random.choice(best_suits)
-        return chosen_suit
+        self.choices[4] = suit
+        self.current_suit_choice = suit
+        return suit
     
     def determine_round4_winner(self):
         """Determine if we won round 4 (Suit)"""
@@ -275,4 +270,3 @@ class GameState:
             chosen_suit = self.determine_round4_choice()
             
         return card4['suit'] == chosen_suit
-    
\ No newline at end of file
@@ -0,0 +1,188 @@
+# Table-driven state machine for the game loop
+
+import time
+from config import *
+from card_detection import capture_card_region, detect_card_color, start_card_recognition, vote_card
+from screen_capture import CARD_BOX_TOP_LEFT
+from ui_interaction import *
+import instrumentation
+from journal import get_journal
+from background_writer import write_line
+
+# States
+WAIT_READY = "WAIT_READY"  # Click Ready until the round 1 options show
+CHOOSE = "CHOOSE"  # Wait for this round's options, decide and click
+WAIT_CARD = "WAIT_CARD"  # Wait for the new card to replace the previous one and settle
+RECOGNIZE = "RECOGNIZE"  # Capture the card box and identify the card
+RESOLVE = "RESOLVE"  # Score the round and update the balance
+CASHOUT = "CASHOUT"  # Take the cash-out payout
+
+# {state: (handler method, timeout in seconds or None)}
+STATE_TABLE = {
+    WAIT_READY: ("wait_ready", None),  # ready_up() bounds itself with MAX_READY_ATTEMPTS
+    CHOOSE: ("choose", MAX_OPTION_WAIT_TIME),
+    WAIT_CARD: ("wait_card", CARD_WAIT_TIME),
+    RECOGNIZE: ("recognize", None),
+    RESOLVE: ("resolve", None),
+    CASHOUT: ("cashout", None),
+}
+
+class GameLoop:
+    """Plays games one state at a time; each handler does its step and returns the next state
+
+    Hooks run on entering and leaving states, so work can be overlapped with the waits
+    (e.g. prefetching) without touching the handlers. Time spent in every state is recorded
+    in the instrumentation histograms, and a game is timed from one WAIT_READY to the next.
+    """
+
+    def __init__(self, game_state):
+        self.game_state = game_state
+        self.state = WAIT_READY
+        self.enter_hooks = {state: [] for state in STATE_TABLE}  # {state: [hook(loop)]}
+        self.exit_hooks = {state: [] for state in STATE_TABLE}  # {state: [hook(loop, next_state)]}
+        self.game_start = None
+        self.state_ns = {}  # {state: nanoseconds spent in it during the current game}
+        self.baseline = None  # Card face snapshot taken just before the choice click
+        self.card = None  # Card identified in the current round
+        self.winners = {
+            1: game_state.determine_round1_winner,
+            2: game_state.determine_round2_winner,
+            3: game_state.determine_round3_winner,
+            4: game_state.determine_round4_winner,
+        }
+
+    def add_hook(self, state, on_enter=None, on_exit=None):
+        """Register on_enter(loop) and/or on_exit(loop, next_state) for a state"""
+        if on_enter:
+            self.enter_hooks[state].append(on_enter)
+        if on_exit:
+            self.exit_hooks[state].append(on_exit)
+
+    def step(self):
+        """Run the current state's handler and move to the state it returns"""
+        handler, timeout = self.enter_state()
+        start = time.perf_counter_ns()
+        next_state = handler(timeout)
+        self.leave_state(next_state, time.perf_counter_ns() - start)
+
+    def enter_state(self):
+        """Run the current state's enter hooks and return (handler, timeout) from the table"""
+        handler, timeout = STATE_TABLE[self.state]
+        for hook in self.enter_hooks[self.state]:
+            hook(self)
+        return getattr(self, handler), timeout
+
+    def leave_state(self, next_state, elapsed_ns):
+        """Record time spent in the current state, run its exit hooks and move to next_state"""
+        state = self.state
+        instrumentation.record(f"state:{state}", elapsed_ns)
+        self.state_ns[state] = self.state_ns.get(state, 0) + elapsed_ns
+        for hook in self.exit_hooks[state]:
+            hook(self, next_state)
+        if next_state == WAIT_READY and state != WAIT_READY:
+            self.end_game()
+        self.state = next_state
+
+    def run(self):
+        """Play games until interrupted"""
+        while True:
+            self.step()
+
+    def end_game(self):
+        """Record the wall-clock time of the game that just finished or was abandoned, and journal it"""
+        now = time.perf_counter_ns()
+        if self.game_start is not None:
+            game_ns = now - self.game_start
+            instrumentation.record("game", game_ns)
+            journal = get_journal()
+            if journal:
+                journal.add(self.game_state.finished_game(), self.game_state.balance, game_ns, self.state_ns)
+        self.state_ns = {}
+        self.game_start = now
+
+    def wait_ready(self, timeout):
+        # Click Ready once and wait for the options, re-clicking only if nothing changes
+        if not ready_up():
+            write_line("Failed to detect options after maximum attempts")
+            return WAIT_READY
+        if self.game_start is None:
+            self.game_start = time.perf_counter_ns()
+        return CHOOSE
+
+    def choose(self, timeout):
+        game_state = self.game_state
+        # Round 1 options are already up once WAIT_READY succeeds
+        if game_state.round > 1 and not wait_for_option_available(timeout=timeout):
+            write_line(f"Options for round {game_state.round} not detected, restarting")
+            game_state.reset_round()
+            return WAIT_READY
+
+        click = self.choice_click()
+        self.baseline = capture_card_face()
+        click()
+        return WAIT_CARD
+
+    def choice_click(self):
+        """Decide this round's choice (recording it for scoring) and return the click for it"""
+        game_state = self.game_state
+        if game_state.round == 1:
+            return click_red  # Always choose red
+        if game_state.round == 2:
+            return click_higher if game_state.determine_round2_choice() == "higher" else click_lower
+        if game_state.round == 3:
+            return click_inside if game_state.determine_round3_choice() == "inside" else click_outside
+        suit = game_state.determine_round4_choice()
+        return lambda: click_suit(suit)
+
+    def wait_card(self, timeout):
+        # Carry on after a timeout as well; recognition decides whether a card is there
+        wait_for_card_to_appear(self.baseline, timeout=timeout)
+        return RECOGNIZE
+
+    def recognize(self, timeout):
+        # Capture the card region only and start value and suit recognition straight away
+        screen = capture_card_region()
+        recognition = start_card_recognition(screen, CARD_BOX_TOP_LEFT)
+        if self.take_black_card(screen):
+            return RESOLVE
+
+        self.card, timings = recognition.result()
+        if not recognition.confident():
+            # Re-read a few more frames instead of writing the round off as a loss
+            self.card = vote_card(recognition)
+        self.game_state.add_card(self.card)
+        return RESOLVE
+
+    def take_black_card(self, screen):
+        """Round 1 only needs the color: take a confident black card as the round's card without waiting for the rest"""
+        if self.game_state.round != 1:
+            return False
+        color, confidence = detect_card_color(screen, CARD_BOX_TOP_LEFT)
+        if color != 'black' or confidence < COLOR_CONFIDENCE_THRESHOLD:
+            return False
+        self.card = {'value': None, 'suit': None, 'numeric_value': None, 'color': color}
+        self.game_state.add_card(self.card)
+        return True
+
+    def resolve(self, timeout):
+        game_state = self.game_state
+        round_number = game_state.round
+        if not self.card:
+            write_line(f"Failed to identify card in round {round_number}")
+            game_state.update_balance(False)  # Assume loss if card detection fails
+            return WAIT_READY
+
+        won = self.winners[round_number]()
+        game_state.update_balance(won)
+        if not won or round_number == 4:
+            return WAIT_READY  # Start over after a loss or after round 4
+
+        # Cash out when the payout beats the expected value of playing on
+        if CASHOUT_BUTTON and game_state.should_cash_out():
+            return CASHOUT
+        return CHOOSE
+
+    def cashout(self, timeout):
+        click_cash_out()
+        self.game_state.cash_out()
+        return WAIT_READY
@@ -0,0 +1,126 @@
+# In-process card value recognition (nearest-neighbour glyph matching)
+
+import cv2
+import numpy as np
+from config import *
+from template_bank import get_template_bank
+from buffers import scratch
+
+def glyph_features(thresh):
+    """Normalise a thresholded glyph into a unit-length feature vector
+
+    threshold_number_image() leaves the (light) ink at 0 on a 255 background, so the glyph is
+    inverted to white on black first. The vector lives in a per-thread buffer that the next call
+    overwrites; copy it to keep it.
+    """
+    ink = cv2.bitwise_not(thresh, dst=scratch('glyph_ink', thresh.shape))
+    # Crop to the ink's bounding box so position within the region does not matter
+    x, y, w, h = cv2.boundingRect(ink)
+    if w == 0 or h == 0:
+        return None
+    glyph = cv2.resize(ink[y:y + h, x:x + w], (GLYPH_SIZE, GLYPH_SIZE),
+                       dst=scratch('glyph', (GLYPH_SIZE, GLYPH_SIZE)), interpolation=cv2.INTER_AREA)
+
+    vector = scratch('glyph_vector', (GLYPH_SIZE * GLYPH_SIZE,), np.float32)
+    np.copyto(vector, glyph.ravel())
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    vector /= norm
+    return vector
+
+class GlyphClassifier:
+    """Correlates a value glyph against every labelled sample in one matrix product
+
+    classify() only answers once every card value has at least one sample; until then
+    every card goes to the OCR and template fallbacks.
+    """
+
+    def __init__(self, samples):
+        labels = []
+        vectors = []
+        for label, thresh in samples:
+            vector = glyph_features(thresh)
+            if vector is not None:
+                labels.append(label)
+                vectors.append(vector.copy())
+
+        self.labels = np.array(labels)
+        self.vectors = np.array(vectors, dtype=np.float32).reshape(len(vectors), GLYPH_SIZE * GLYPH_SIZE)
+        self.missing = [value for value in CARD_VALUES if value not in labels]
+        self.enabled = not self.missing
+        if self.missing:
+            print(f"Warning: Glyph classifier disabled, no samples for {', '.join(self.missing)} "
+                  f"(add <value>_<n>.png glyphs to {GLYPH_SAMPLE_DIR})")
+
+    def scores(self, thresh):
+        """Return {label: best correlation} for a thresholded glyph"""
+        vector = glyph_features(thresh)
+        if vector is None or not len(self.labels):
+            return {}
+
+        correlations = np.dot(self.vectors, vector, out=scratch('glyph_correlations', (len(self.labels),), np.float32))
+        scores = {}
+        for label, score in zip(self.labels, correlations):
+            if score > scores.get(label, -1.0):
+                scores[label] = float(score)
+        return scores
+
+    def classify(self, thresh):
+        """Return (label, score) for a thresholded glyph, label None if not confident or disabled"""
+        if not self.enabled:
+            return None, 0.0
+        scores = self.scores(thresh)
+        if not scores:
+            return None, 0.0
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        label, score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else -1.0
+
+        if score >= GLYPH_MATCH_THRESHOLD and score - runner_up >= GLYPH_MIN_MARGIN:
+            return label, score
+        return None, score
+
+_classifier = None
+
+def get_glyph_classifier():
+    """Return the shared glyph classifier, building it from the template bank on first use"""
+    global _classifier
+    if _classifier is None:
+        _classifier = GlyphClassifier(get_template_bank().glyph_samples)
+    return _classifier
+
+def check_shifts(samples, margin=4):
+    """Check that every sample is still matched to its own value when moved around a larger region
+
+    Returns the (label, dx, dy) placements that were not.
+    """
+    classifier = GlyphClassifier(samples)
+    failures = []
+    for label, thresh in samples:
+        height, width = thresh.shape
+        for dx in range(0, 2 * margin + 1, margin):
+            for dy in range(0, 2 * margin + 1, margin):
+                # Pad with background (255 after thresholding) so only the glyph's position changes
+                region = np.full((height + 2 * margin, width + 2 * margin), 255, dtype=np.uint8)
+                region[dy:dy + height, dx:dx + width] = thresh
+                scores = classifier.scores(region)
+                if not scores or max(scores, key=scores.get) != label:
+                    failures.append((label, dx, dy))
+    return failures
+
+def main():
+    """Command line entry point: check the glyph samples"""
+    samples = get_template_bank().glyph_samples
+    print(f"{len(samples)} glyph samples: {', '.join(sorted({label for label, thresh in samples}, key=CARD_VALUES.get))}")
+    failures = check_shifts(samples)
+    if failures:
+        for label, dx, dy in failures:
+            print(f"Sample {label} not matched when shifted by ({dx}, {dy})")
+    else:
+        print("Every sample matches itself wherever it sits in the region")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# Lightweight hot-path instrumentation: perf_counter_ns spans aggregated into latency histograms
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from config import *
+from background_writer import get_background_writer, emit_line
+
+class LatencyHistogram:
+    """HDR-style histogram of nanosecond latencies with log-linear buckets
+
+    Values below 2**sub_bucket_bits are exact; above that every power-of-two range is split
+    into 2**(sub_bucket_bits - 1) buckets, so the relative error stays below 2**(1 - sub_bucket_bits).
+    """
+
+    def __init__(self, sub_bucket_bits=HISTOGRAM_SUB_BUCKET_BITS, max_value_bits=40):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.half = 1 << (sub_bucket_bits - 1)
+        self.counts = [0] * ((max_value_bits - sub_bucket_bits + 2) * self.half)
+        self.max_index = len(self.counts) - 1
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.lock = threading.Lock()
+
+    def bucket_index(self, value):
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value
+        return min(shift * self.half + (value >> shift), self.max_index)
+
+    def bucket_value(self, index):
+        """Midpoint of the values that fall into bucket index"""
+        if index < 2 * self.half:
+            return index
+        shift = index // self.half - 1
+        low = (index - shift * self.half) << shift
+        return low + ((1 << shift) - 1) / 2
+
+    def record(self, value):
+        """Record one latency in nanoseconds"""
+        index = self.bucket_index(value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+            self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100) in nanoseconds"""
+        if not self.count:
+            return 0.0
+        target = max(1, round(self.count * q / 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self.bucket_value(index), self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds):
+        """Number of latencies at or below each bound (ascending nanoseconds), to bucket precision"""
+        with self.lock:
+            counts = list(self.counts)
+        cumulative = []
+        seen = 0
+        start = 0
+        for bound in bounds:
+            end = self.bucket_index(int(bound)) + 1
+            seen += sum(counts[start:end])
+            start = max(start, end)
+            cumulative.append(seen)
+        return cumulative
+
+    def reset(self):
+        with self.lock:
+            self.counts = [0] * len(self.counts)
+            self.count = 0
+            self.total = 0
+            self.min = None
+            self.max = 0
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+_counters = {}  # {event name: count}
+_last_dump = time.monotonic()
+
+def get_histogram(name):
+    """Return the histogram for a stage, creating it on first use"""
+    histogram = _histograms.get(name)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(name, LatencyHistogram())
+    return histogram
+
+def record(name, nanoseconds):
+    """Record a latency for a stage"""
+    get_histogram(name).record(nanoseconds)
+
+def histograms():
+    """Return a snapshot of {stage: histogram}"""
+    with _histograms_lock:
+        return dict(_histograms)
+
+def increment(name, amount=1):
+    """Count an event (e.g. a recognition failure)"""
+    with _histograms_lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def counters():
+    """Return a snapshot of {event: count}"""
+    with _histograms_lock:
+        return dict(_counters)
+
+@contextmanager
+def span(name):
+    """Time the enclosed block into the stage histogram"""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter_ns() - start)
+
+def timed(name):
+    """Decorator timing every call of a function into the stage histogram"""
+    def decorator(func):
+        histogram = get_histogram(name)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record(time.perf_counter_ns() - start)
+        return wrapper
+    return decorator
+
+def report():
+    """Return a table of count, p50/p95/p99/max and total time per stage"""
+    lines = [f"{'Stage':<18}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'total s':>10}"]
+    for name, histogram in sorted(_histograms.items()):
+        if not histogram.count:
+            continue
+        p50, p95, p99 = (histogram.percentile(q) / 1e6 for q in (50, 95, 99))
+        lines.append(f"{name:<18}{histogram.count:>8}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}"
+                     f"{histogram.max / 1e6:>10.2f}{histogram.total / 1e9:>10.2f}")
+    return "\n".join(lines)
+
+def maybe_dump(interval=STATS_DUMP_INTERVAL):
+    """Queue the latency report for printing if interval seconds have passed since the last dump"""
+    global _last_dump
+    if not interval:
+        return
+    now = time.monotonic()
+    if now - _last_dump >= interval:
+        _last_dump = now
+        # Percentiles walk every bucket, so build and print the report off the main loop
+        get_background_writer().submit(lambda: emit_line(report()))
@@ -0,0 +1,186 @@
+# Append-only binary journal of every game, and a memory-mapped reader for analysing it
+
+import argparse
+import os
+import threading
+import time
+import numpy as np
+from config import *
+from cards import Card
+
+# A journal file is a 16-byte header followed by fixed-width JOURNAL_DTYPE records back to back,
+# so it can be memory-mapped as one structured array however many games it holds
+MAGIC = b"RTBJ"
+VERSION = 1
+HEADER_DTYPE = np.dtype([('magic', 'S4'), ('version', '<u4'), ('record_size', '<u4'), ('reserved', '<u4')])
+
+OUTCOMES = ("lost", "won", "cashed_out", "abandoned")
+# Choice codes: what was picked in each round (round 1 is always red)
+CHOICES = ("red", "black", "higher", "lower", "inside", "outside") + tuple(SUITS)
+# Game loop states, in the order their times are stored
+STATES = ("WAIT_READY", "CHOOSE", "WAIT_CARD", "RECOGNIZE", "RESOLVE", "CASHOUT")
+
+JOURNAL_DTYPE = np.dtype([
+    ('time', '<f8'),  # Unix time the game ended
+    ('cards', 'i1', (4,)),  # Card code per round (cards.Card), -1 if not reached or not fully read
+    ('choices', 'i1', (4,)),  # Index into CHOICES per round, -1 if not reached
+    ('rounds_won', 'u1'),
+    ('outcome', 'u1'),  # Index into OUTCOMES
+    ('payout', '<i4'),  # Balance change from this game
+    ('balance', '<i8'),  # Balance after the game
+    ('game_ms', '<f4'),  # Wall-clock time of the game, from one WAIT_READY to the next
+    ('state_ms', [(state, '<f4') for state in STATES]),  # Time spent in each state
+])
+
+def journal_header():
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    header['record_size'] = JOURNAL_DTYPE.itemsize
+    return header
+
+def check_header(header, path):
+    if header['magic'] != MAGIC or header['version'] != VERSION or header['record_size'] != JOURNAL_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a version {VERSION} game journal")
+
+class JournalWriter:
+    """Fills game records into an in-memory batch and appends each full batch to the file
+
+    A batch is a few kilobytes, so it is written directly rather than through the background
+    writer, whose queue drops work under debug-image load.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, batch_size=JOURNAL_BATCH_SIZE):
+        self.path = path
+        self.batch = np.zeros(batch_size, dtype=JOURNAL_DTYPE)
+        self.count = 0
+        self.lock = threading.Lock()
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                check_header(np.frombuffer(f.read(HEADER_DTYPE.itemsize), dtype=HEADER_DTYPE)[0], path)
+            # Drop a partly written record left by a crash, so appends stay aligned
+            size = os.path.getsize(path)
+            whole = HEADER_DTYPE.itemsize + (size - HEADER_DTYPE.itemsize) // JOURNAL_DTYPE.itemsize * JOURNAL_DTYPE.itemsize
+            if whole != size:
+                os.truncate(path, whole)
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "ab")
+            self.file.write(journal_header().tobytes())
+            self.file.flush()
+
+    def add(self, game, balance, game_ns, state_ns):
+        """Record one game
+
+        game is GameState.finished_game() (None for a game abandoned before it was scored) and
+        state_ns maps state names to nanoseconds spent in them during the game.
+        """
+        with self.lock:
+            record = self.batch[self.count]
+            record['time'] = time.time()
+            record['balance'] = balance
+            record['game_ms'] = game_ns / 1e6
+            for state, elapsed_ns in state_ns.items():
+                if state in STATES:
+                    record['state_ms'][state] = elapsed_ns / 1e6
+
+            record['cards'] = -1
+            record['choices'] = -1
+            if game is None:
+                record['outcome'] = OUTCOMES.index("abandoned")
+            else:
+                for index, card in enumerate(game['cards'][:4]):
+                    if isinstance(card, Card):
+                        record['cards'][index] = card.code
+                for round_number, choice in game['choices'].items():
+                    record['choices'][round_number - 1] = CHOICES.index(choice)
+                record['rounds_won'] = game['rounds_won']
+                record['outcome'] = OUTCOMES.index(game['outcome'])
+                record['payout'] = game['payout']
+
+            self.count += 1
+            if self.count == len(self.batch):
+                self.flush_batch()
+
+    def flush_batch(self):
+        """Append the buffered records (call with the lock held)"""
+        if not self.count:
+            return
+        self.file.write(self.batch[:self.count].tobytes())
+        self.file.flush()
+        self.batch[:self.count] = 0
+        self.count = 0
+
+    def flush(self):
+        with self.lock:
+            self.flush_batch()
+
+    def close(self):
+        """Append the buffered records and close the file"""
+        with self.lock:
+            self.flush_batch()
+            self.file.close()
+
+def load_journal(path=JOURNAL_FILE):
+    """Return every complete record of a journal as a read-only memory-mapped structured array"""
+    with open(path, "rb") as f:
+        check_header(np.frombuffer(f.read(HEADER_DTYPE.itemsize), dtype=HEADER_DTYPE)[0], path)
+    # A crash can leave a partly written last record; only whole records are mapped
+    count = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // JOURNAL_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=JOURNAL_DTYPE)
+    return np.memmap(path, dtype=JOURNAL_DTYPE, mode='r', offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+_journal = None
+
+def get_journal():
+    """Return the shared journal for JOURNAL_FILE, or None if journaling is disabled"""
+    global _journal
+    if _journal is None and JOURNAL_FILE:
+        _journal = JournalWriter(JOURNAL_FILE)
+    return _journal
+
+def close_journal():
+    """Append any buffered games and close the journal"""
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
+
+def summarize(records):
+    """Print totals, throughput and per-state times for a set of journal records"""
+    games = len(records)
+    if not games:
+        print("No games recorded")
+        return
+
+    outcomes = np.bincount(records['outcome'], minlength=len(OUTCOMES))
+    print(f"Games: {games}  " + ", ".join(f"{name}: {count}" for name, count in zip(OUTCOMES, outcomes)))
+    payout = records['payout'].astype(np.int64)
+    print(f"Net: ${payout.sum()} (${payout.mean():.2f} per game), final balance ${records['balance'][-1]}")
+
+    hours = (records['time'][-1] - records['time'][0] + records['game_ms'][0] / 1000) / 3600
+    if hours > 0:
+        print(f"Throughput: {games / hours:.0f} games/hour over {hours:.2f} hours")
+
+    print(f"{'State':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name in ("game",) + STATES:
+        times = records['game_ms'] if name == "game" else records['state_ms'][name]
+        p50, p95, p99 = np.percentile(times, [50, 95, 99])
+        print(f"{name:<12}{times.mean():>10.1f}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}")
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Summarise a game journal")
+    parser.add_argument("path", nargs="?", default=JOURNAL_FILE, help="Journal file")
+    parser.add_argument("--last", type=int, default=None, help="Only the last N games")
+    args = parser.parse_args()
+
+    records = load_journal(args.path)
+    if args.last:
+        records = records[-args.last:]
+    summarize(records)
+
+if __name__ == "__main__":
+    main()
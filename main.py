@@ -1,200 +1,101 @@
 # Main program for Ride The Bus bot
 
+import asyncio
 import time
-from datetime import datetime
-import sys
-from colorama import init
-from card_detection import identify_card, capture_screen, save_debug_image
 from game_logic import GameState
-from ui_interaction import *
-from utils import setup_logging
+import instrumentation
+from background_writer import flush_background_writer, close_background_writer, write_line
 from config import *
 
+# The vision stack (cv2, mss, pyautogui, pytesseract) is imported inside main() and warm_up(),
+# so importing this module stays cheap for tooling
+
+def print_stats(game_state):
+    """Print the session statistics"""
+    from ui_interaction import option_watcher
+    from recognition_cache import get_card_cache
+    
+    # Let queued game results print first
+    flush_background_writer()
+    print(f"Final balance: ${game_state.balance}")
+    print(f"Games played: {game_state.total_games}")
+    print(f"Wins: {game_state.wins}, Losses: {game_state.losses}, Cash-outs: {game_state.cashouts}")
+    print(option_watcher.summary())
+    print(get_card_cache().summary())
+    print(instrumentation.report())
+
+def warm_up():
+    """Load templates, matchers, the OCR engine, the card cache and the capture handle before the first game"""
+    from card_detection import warm_up_recognition
+    from recognition_cache import get_card_cache
+    from screen_capture import get_capture
+    
+    start_time = time.perf_counter()
+    warm_up_recognition()
+    get_card_cache()
+    # Opens this thread's capture handle
+    get_capture().grab_card()
+    print(f"Warm-up done in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
 def main():
     """Main program loop"""
+    from colorama import init
+    from screen_capture import CaptureExhausted
+    from recognition_cache import save_card_cache
+    from ui_interaction import wait_for_game_window
+    from game_loop import GameLoop, WAIT_READY
+    from journal import close_journal
+    from metrics import start_metrics_server, stop_metrics_server
+    
     # Initialize colorama for cross-platform color support
     init()
     
     # Setup
     print("Starting Ride The Bus bot...")
-    time.sleep(3)
+    warm_up()
     
     game_state = GameState()
     print(f"Initial balance: ${game_state.balance}")
+    print(f"Expected value per game: ${game_state.solver.value:.2f}")
+    
+    # Optional /metrics endpoint for scrapers (METRICS_PORT)
+    start_metrics_server(game_state)
+    
+    # Start as soon as the game window is in front
+    wait_for_game_window()
+    
+    # Play games through the state machine, dumping latency stats between games
+    if USE_ASYNC_RUNTIME:
+        from async_runtime import AsyncGameLoop
+        game_loop = AsyncGameLoop(game_state)
+    else:
+        game_loop = GameLoop(game_state)
+    game_loop.add_hook(WAIT_READY, on_enter=lambda loop: instrumentation.maybe_dump())
     
     try:
-        # Main game loop
-        while True:
-            
-            # Click Ready button until options are available
-            attempts = 0
-            max_attempts = 20
-            while not is_option_available() and attempts < max_attempts:
-                click_ready()  # This already includes a 1-second cooldown
-                attempts += 1
-                # Short wait before checking again
-                time.sleep(0.2)
-            
-            if attempts >= max_attempts:
-                print("Failed to detect options after maximum attempts")
-                continue
-            
-            # Round 1: Red or Black
-            if game_state.round == 1:
-                # Always choose red
-                click_red()
-                
-                # Wait 1.5 seconds for card to appear
-                wait_for_card_to_appear()
-                
-                # Capture screen
-                screen = capture_screen()
-                
-                # Identify the card
-                card = identify_card(screen)
-                game_state.add_card(card)
-                
-                if not card:
-                    print("Failed to identify card in round 1")
-                    game_state.update_balance(False)  # Assume loss if card detection fails
-                    continue
-                
-                # Determine if we won
-                won = game_state.determine_round1_winner()
-                game_state.update_balance(won)
-                
-                if not won:
-                    continue  # Start over if we lost
-            
-            # Wait for next round options
-            if not wait_for_option_available(timeout=15):
-                print("Options for round 2 not detected, restarting")
-                game_state.reset_round()
-                continue
-            
-            # Round 2: Higher or Lower
-            if game_state.round == 2:
-                # Determine best choice
-                choice = game_state.determine_round2_choice()
-                
-                # Make the choice
-                if choice == "higher":
-                    click_higher()
-                else:
-                    click_lower()
-                
-                # Wait 1.5 seconds for card to appear
-                wait_for_card_to_appear()
-                
-                # Capture screen
-                screen = capture_screen()
-                
-                # Identify the card
-                card = identify_card(screen)
-                game_state.add_card(card)
-                
-                if not card:
-                    print("Failed to identify card in round 2")
-                    game_state.update_balance(False)  # Assume loss if card detection fails
-                    continue
-                
-                # Determine if we won
-                won = game_state.determine_round2_winner()
-                game_state.update_balance(won)
-                
-                if not won:
-                    continue  # Start over if we lost
-            
-            # Wait for next round options
-            if not wait_for_option_available(timeout=15):
-                print("Options for round 3 not detected, restarting")
-                game_state.reset_round()
-                continue
-            
-            # Round 3: Inside or Outside
-            if game_state.round == 3:
-                # Determine best choice
-                choice = game_state.determine_round3_choice()
-                
-                # Make the choice
-                if choice == "inside":
-                    click_inside()
-                else:
-                    click_outside()
-                
-                # Wait 1.5 seconds for card to appear
-                wait_for_card_to_appear()
-                
-                # Capture screen
-                screen = capture_screen()
-                
-                # Identify the card
-                card = identify_card(screen)
-                game_state.add_card(card)
-                
-                if not card:
-                    print("Failed to identify card in round 3")
-                    game_state.update_balance(False)  # Assume loss if card detection fails
-                    continue
-                
-                # Determine if we won
-                won = game_state.determine_round3_winner()
-                game_state.update_balance(won)
-                
-                if not won:
-                    continue  # Start over if we lost
-            
-            # Wait for next round options
-            if not wait_for_option_available(timeout=15):
-                print("Options for round 4 not detected, restarting")
-                game_state.reset_round()
-                continue
-            
-            # Round 4: Suit
-            if game_state.round == 4:
-                # Determine best choice
-                suit = game_state.determine_round4_choice()
-                game_state.current_suit_choice = suit  # Store the choice
-                
-                # Make the choice
-                click_suit(suit)
-                
-                # Wait 1.5 seconds for card to appear
-                wait_for_card_to_appear()
-                
-                # Capture screen
-                screen = capture_screen()
-                
-                # Identify the card
-                card = identify_card(screen)
-                game_state.add_card(card)
-                
-                if not card:
-                    print("Failed to identify card in round 4")
-                    game_state.update_balance(False)  # Assume loss if card detection fails
-                    continue
-                
-                # Determine if we won
-                won = game_state.determine_round4_winner()
-                game_state.update_balance(won)
-                
-                # Always start over after round 4
-                game_state.total_games += 1
-                continue
-            
-            # No sleep between iterations - the program will naturally
-            # move to the next iteration without artificial delay
+        if USE_ASYNC_RUNTIME:
+            asyncio.run(game_loop.run())
+        else:
+            game_loop.run()
     
     except KeyboardInterrupt:
-        print("Bot stopped by user")
-        print(f"Final balance: ${game_state.balance}")
-        print(f"Games played: {game_state.total_games}")
-        print(f"Wins: {game_state.wins}, Losses: {game_state.losses}")
+        write_line("Bot stopped by user")
+        print_stats(game_state)
+    except CaptureExhausted:
+        write_line("No more frames to capture")
+        print_stats(game_state)
     except Exception as e:
-        print(f"Unhandled exception: {str(e)}")
+        write_line(f"Unhandled exception: {str(e)}")
         import traceback
-        print(traceback.format_exc())
+        write_line(traceback.format_exc())
     finally:
+        stop_metrics_server()
+        save_card_cache()
+        if game_state.last_game is not None or game_loop.state != WAIT_READY:
+            # Journal the game in progress (scored or abandoned) before the journal closes
+            game_loop.end_game()
+        close_journal()
+        close_background_writer()
         print("Bot shutting down")
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+# Optional Prometheus metrics endpoint, served from a background thread with the standard library
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import *
+import instrumentation
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels.items()) + "}"
+
+def format_metrics(game_state, uptime):
+    """Render the session counters, balance and stage latency histograms in Prometheus text format"""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+    hours = uptime / 3600
+    metric("rtb_uptime_seconds", "gauge", "Seconds since the bot started", [({}, f"{uptime:.3f}")])
+    metric("rtb_games_total", "counter", "Games finished (won, lost or cashed out)",
+           [({}, game_state.total_games)])
+    metric("rtb_game_outcomes_total", "counter", "Finished games by outcome", [
+        ({'outcome': "won"}, game_state.wins),
+        ({'outcome': "lost"}, game_state.losses),
+        ({'outcome': "cashed_out"}, game_state.cashouts),
+    ])
+    metric("rtb_games_per_hour", "gauge", "Average games per hour since the bot started",
+           [({}, f"{game_state.total_games / hours:.1f}" if hours else 0)])
+    metric("rtb_balance", "gauge", "Current balance in dollars", [({}, game_state.balance)])
+
+    counters = instrumentation.counters()
+    metric("rtb_recognition_failures_total", "counter", "Cards not fully identified, even after voting",
+           [({}, counters.get("recognition_failures", 0))])
+
+    # Stage histograms are cumulative for the whole session, as Prometheus expects
+    bounds = METRICS_LATENCY_BUCKETS
+    name = "rtb_stage_latency_seconds"
+    lines.append(f"# HELP {name} Latency of each timed stage, game loop state and whole game")
+    lines.append(f"# TYPE {name} histogram")
+    for stage, histogram in sorted(instrumentation.histograms().items()):
+        if not histogram.count:
+            continue
+        cumulative = histogram.cumulative_counts([bound * 1e9 for bound in bounds])
+        for bound, count in zip(bounds, cumulative):
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total / 1e9:.6f}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Answers GET /metrics; everything else is a 404"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        server = self.server
+        body = format_metrics(server.game_state, time.monotonic() - server.start_time).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the bot's console
+
+_server = None
+
+def start_metrics_server(game_state, port=METRICS_PORT, host=METRICS_HOST):
+    """Serve /metrics for game_state on a daemon thread, returning the server (None if port is None)"""
+    global _server
+    if port is None or _server is not None:
+        return _server
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"Warning: Could not serve metrics on {host}:{port}: {str(e)}")
+        return None
+    server.daemon_threads = True
+    server.game_state = game_state
+    server.start_time = time.monotonic()
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    _server = server
+    print(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+def stop_metrics_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
@@ -0,0 +1,97 @@
+# Cache of recognised cards keyed by a quantized hash of the card box
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import cv2
+from config import *
+from cards import Card, ALL_CARDS
+
+def card_cache_key(card_box):
+    """Hash a card box crop after downsampling and quantizing away capture noise"""
+    small = cv2.resize(card_box, CARD_CACHE_HASH_SIZE, interpolation=cv2.INTER_AREA)
+    quantized = small >> CARD_CACHE_QUANTIZE_BITS
+    return hashlib.blake2b(quantized.tobytes(), digest_size=8).hexdigest()
+
+class RecognitionCache:
+    """Bounded LRU cache of recognised Cards (stored as 0..51 codes) by card box hash"""
+
+    def __init__(self, max_size=CARD_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached Card for key, or None"""
+        code = self.entries.get(key)
+        if code is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return ALL_CARDS[code]
+
+    def put(self, key, card):
+        """Store a fully identified card, evicting the least recently used entry when full"""
+        if not isinstance(card, Card):
+            return  # Never cache partial detections
+        self.entries[key] = card.code
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def save(self, path=CARD_CACHE_FILE):
+        """Write the cache to disk so a warm cache survives restarts"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path=CARD_CACHE_FILE):
+        """Load entries saved by save(), if the file exists"""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load card cache from {path}: {e}")
+            return
+        for key, card in entries.items():
+            if isinstance(card, dict):
+                # Older cache files stored card dicts
+                card = Card.from_value(card['value'], card['suit'])
+            else:
+                card = ALL_CARDS[card]
+            self.put(key, card)
+
+    def summary(self):
+        """Return a one-line summary of cache effectiveness"""
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return f"Card cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate), {len(self.entries)} entries"
+
+_cache = None
+_persist = CARD_CACHE_PERSIST
+
+def get_card_cache():
+    """Return the shared recognition cache, loading it from disk on first use if persistence is enabled"""
+    global _cache
+    if _cache is None:
+        _cache = RecognitionCache()
+        if _persist:
+            _cache.load()
+    return _cache
+
+def save_card_cache():
+    """Persist the shared cache if persistence is enabled"""
+    if _cache is not None and _persist:
+        _cache.save()
+
+def reset_card_cache(persist=CARD_CACHE_PERSIST):
+    """Drop the shared cache without saving it; the next one is loaded and saved only if persist is set"""
+    global _cache, _persist
+    _cache = None
+    _persist = persist
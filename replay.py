@@ -0,0 +1,268 @@
+# Offline replay of recorded frames through the detection pipeline and the main loop
+
+import argparse
+import os
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+from config import *
+import screen_capture
+import recognition_cache
+import ui_interaction
+import journal
+from screen_capture import CaptureExhausted, CARD_BOX_TOP_LEFT, CARD_BOX_BOTTOM_RIGHT
+from background_writer import write_line, flush_background_writer
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+class DirectoryFrames:
+    """Image files in a directory, memory-mapped and decoded only when a frame is requested"""
+
+    def __init__(self, directory, cache_size=REPLAY_DECODE_CACHE):
+        self.paths = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                      if name.lower().endswith(IMAGE_EXTENSIONS)]
+        self.cache_size = cache_size
+        self.decoded = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        with self.lock:
+            frame = self.decoded.get(index)
+            if frame is None:
+                if index >= len(self.paths):
+                    raise IndexError(index)
+                data = np.memmap(self.paths[index], dtype=np.uint8, mode='r')
+                frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+                self.decoded[index] = frame
+                while len(self.decoded) > self.cache_size:
+                    self.decoded.popitem(last=False)
+            self.decoded.move_to_end(index)
+            return frame
+
+class ArrayFrames:
+    """Raw BGR frames stacked in a .npy file, memory-mapped so only touched frames are paged in"""
+
+    def __init__(self, path):
+        self.frames = np.load(path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+class VideoFrames:
+    """Frames of a video file, decoded on demand (skipped frames are grabbed but never decoded)"""
+
+    def __init__(self, path):
+        self.video = cv2.VideoCapture(path)
+        if not self.video.isOpened():
+            raise ValueError(f"Could not open video {path}")
+        self.length = int(self.video.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.position = 0  # Index of the next frame the decoder will return
+        self.last_index = None
+        self.last_frame = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        with self.lock:
+            if index == self.last_index:
+                return self.last_frame
+            if index < self.position:
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, index)
+                self.position = index
+            while self.position < index:
+                if not self.video.grab():
+                    raise IndexError(index)
+                self.position += 1
+            ok, frame = self.video.read()
+            if not ok:
+                raise IndexError(index)
+            self.position += 1
+            self.last_index = index
+            self.last_frame = frame
+            return frame
+
+def open_frames(path):
+    """Open a directory of screenshots, a .npy frame stack or a video file"""
+    if os.path.isdir(path):
+        return DirectoryFrames(path)
+    if path.endswith('.npy'):
+        return ArrayFrames(path)
+    return VideoFrames(path)
+
+class ReplayClock:
+    """Virtual clock: sleeping advances time instantly, so replays run as fast as the CPU allows"""
+
+    def __init__(self):
+        self.start = time.time()
+        self.elapsed = 0.0
+
+    def time(self):
+        return self.start + self.elapsed
+
+    def sleep(self, seconds):
+        self.elapsed += max(seconds, 0)
+
+class ReplayCapture:
+    """Stand-in for ScreenCapture that serves recorded full-screen frames
+
+    Frames advance either with the virtual clock at fps, or by one frame per click.
+    """
+
+    def __init__(self, frames, clock, fps=REPLAY_FPS, advance='time'):
+        self.frames = frames
+        self.clock = clock
+        self.fps = fps
+        self.advance = advance
+        self.clicks = 0
+
+    def frame_index(self):
+        if self.advance == 'click':
+            return self.clicks
+        return int(self.clock.elapsed * self.fps)
+
+    def current_frame(self):
+        """Return the frame showing at the current replay position"""
+        try:
+            return self.frames[self.frame_index()]
+        except IndexError:
+            raise CaptureExhausted(f"Replay finished after {len(self.frames)} frames")
+
+    def on_click(self):
+        self.clicks += 1
+
+    def grab_region(self, top_left, bottom_right, out=None):
+        """Crop a region (screen coordinates, bottom-right exclusive) out of the current frame"""
+        x1, y1 = top_left
+        x2, y2 = bottom_right
+        region = self.current_frame()[y1:y2, x1:x2]
+        if out is not None:
+            np.copyto(out, region)
+            return out
+        # Copy so callers get an owned array, as they would from mss
+        return np.ascontiguousarray(region)
+
+    def grab_pixel(self, x, y):
+        """Return a single pixel of the current frame as an RGB tuple"""
+        b, g, r = self.current_frame()[y, x, :3]
+        return (int(r), int(g), int(b))
+
+    def grab_card(self, out=None):
+        """Crop the card box out of the current frame"""
+        return self.grab_region(CARD_BOX_TOP_LEFT, CARD_BOX_BOTTOM_RIGHT, out)
+
+    def grab_full(self, out=None):
+        """Return a copy of the whole current frame"""
+        if out is not None:
+            np.copyto(out, self.current_frame())
+            return out
+        return np.array(self.current_frame())
+
+    def close(self):
+        pass
+
+class ClickRecorder:
+    """Fake pyautogui click sink that records clicks and lets click-driven replays advance"""
+
+    def __init__(self, capture):
+        self.capture = capture
+        self.clicks = []
+
+    def __call__(self, x, y):
+        self.clicks.append((self.capture.clock.elapsed, x, y))
+        self.capture.on_click()
+
+def install_replay(frames, fps=REPLAY_FPS, advance='time'):
+    """Route capture, clicks and the bot's waits through a replay; returns (capture, recorder)
+
+    Call remove_replay() when the replay ends.
+    """
+    clock = ReplayClock()
+    capture = ReplayCapture(frames, clock, fps, advance)
+    recorder = ClickRecorder(capture)
+    screen_capture.set_capture(capture)
+    screen_capture.set_clock(clock)
+    ui_interaction.set_click_sink(recorder)
+    # Keep replayed cards out of the persistent recognition cache
+    recognition_cache.reset_card_cache(persist=False)
+    # ...and replayed games out of the game journal
+    journal.JOURNAL_FILE = None
+    return capture, recorder
+
+def remove_replay():
+    """Undo install_replay(): real capture, clicks and clock, and a fresh persistent cache and journal"""
+    screen_capture.set_capture(None)
+    screen_capture.set_clock(None)
+    ui_interaction.set_click_sink(None)
+    recognition_cache.reset_card_cache()
+    journal.JOURNAL_FILE = JOURNAL_FILE
+
+def frame_origin(frame):
+    """Frames the size of the card box are card crops; anything else is a full screenshot"""
+    box_height = CARD_BOX_BOTTOM_RIGHT[1] - CARD_BOX_TOP_LEFT[1]
+    box_width = CARD_BOX_BOTTOM_RIGHT[0] - CARD_BOX_TOP_LEFT[0]
+    if frame.shape[:2] == (box_height, box_width):
+        return CARD_BOX_TOP_LEFT
+    return (0, 0)
+
+def replay_cards(frames, use_cache=False):
+    """Identify the card in every frame and print the results and throughput"""
+    from card_detection import recognize_card
+
+    start_time = time.perf_counter()
+    failures = 0
+    for index in range(len(frames)):
+        frame = frames[index]
+        card, timings = recognize_card(frame, frame_origin(frame), use_cache)
+        if not card or not card['value'] or not card['suit']:
+            failures += 1
+        write_line(f"Frame {index}: {card} ({timings['total'] * 1000:.1f} ms)")
+
+    elapsed = time.perf_counter() - start_time
+    rate = len(frames) / elapsed if elapsed else float('inf')
+    write_line(f"Identified {len(frames) - failures}/{len(frames)} cards in {elapsed:.2f} s ({rate:.0f} frames/s)")
+    flush_background_writer()
+
+def replay_game(frames, fps=REPLAY_FPS, advance='time'):
+    """Run the main loop against the recorded frames"""
+    capture, recorder = install_replay(frames, fps, advance)
+    import main
+
+    start_time = time.perf_counter()
+    try:
+        main.main()
+    finally:
+        remove_replay()
+    elapsed = time.perf_counter() - start_time
+    print(f"Replayed {capture.clock.elapsed:.1f} s of game time in {elapsed:.2f} s "
+          f"({len(recorder.clicks)} clicks)")
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Replay recorded frames through the bot headlessly")
+    parser.add_argument("path", help="Directory of screenshots, .npy frame stack or video file")
+    parser.add_argument("--mode", choices=["cards", "game"], default="cards",
+                        help="cards: identify_card on every frame; game: run the main loop")
+    parser.add_argument("--advance", choices=["time", "click"], default="time",
+                        help="Advance frames with the virtual clock or one per click (game mode)")
+    parser.add_argument("--fps", type=float, default=REPLAY_FPS, help="Frame rate of the recording")
+    parser.add_argument("--use-cache", action="store_true", help="Allow recognition cache hits (cards mode)")
+    args = parser.parse_args()
+
+    frames = open_frames(args.path)
+    if args.mode == "cards":
+        replay_cards(frames, args.use_cache)
+    else:
+        replay_game(frames, args.fps, args.advance)
+
+if __name__ == "__main__":
+    main()
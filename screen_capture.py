@@ -0,0 +1,101 @@
+# Screen capture service shared by card detection and UI interaction
+
+import threading
+import time
+import cv2
+import numpy as np
+import mss
+from config import *
+
+# Card box covering both the OCR (value) and suit regions
+CARD_BOX_TOP_LEFT = (min(OCR_TOP_LEFT[0], SUIT_TOP_LEFT[0]),
+                     min(OCR_TOP_LEFT[1], SUIT_TOP_LEFT[1]))
+CARD_BOX_BOTTOM_RIGHT = (max(OCR_BOTTOM_RIGHT[0], SUIT_BOTTOM_RIGHT[0]),
+                         max(OCR_BOTTOM_RIGHT[1], SUIT_BOTTOM_RIGHT[1]))
+
+class CaptureExhausted(Exception):
+    """Raised by capture backends that have no more frames (e.g. the end of a replay)"""
+
+class ScreenCapture:
+    """Long-lived mss handle exposing region-scoped grabs"""
+
+    def __init__(self, monitor_index=MONITOR_INDEX):
+        self.monitor_index = monitor_index
+        # mss handles are bound to the thread that created them, so keep one per thread
+        self._local = threading.local()
+
+    def _get_sct(self):
+        """Return this thread's mss handle, creating it on first use"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            self._local.monitor = sct.monitors[self.monitor_index]
+        return sct
+
+    def to_bgr(self, shot, out=None):
+        """Convert an mss screenshot to a contiguous BGR array, into out if given"""
+        # Wrap mss's BGRA bytes without copying; the alpha channel is dropped by the conversion itself
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=out)
+
+    def grab_region(self, top_left, bottom_right, out=None):
+        """Grab a region (screen coordinates, bottom-right exclusive) as a BGR array, into out if given"""
+        sct = self._get_sct()
+        monitor = self._local.monitor
+        x1, y1 = top_left
+        x2, y2 = bottom_right
+        region = {
+            'left': monitor['left'] + x1,
+            'top': monitor['top'] + y1,
+            'width': x2 - x1,
+            'height': y2 - y1,
+        }
+        return self.to_bgr(sct.grab(region), out)
+
+    def grab_pixel(self, x, y):
+        """Grab a single pixel and return it as an RGB tuple"""
+        b, g, r = self.grab_region((x, y), (x + 1, y + 1))[0, 0]
+        return (int(r), int(g), int(b))
+
+    def grab_card(self, out=None):
+        """Grab the card box holding both the value and suit regions"""
+        return self.grab_region(CARD_BOX_TOP_LEFT, CARD_BOX_BOTTOM_RIGHT, out)
+
+    def grab_full(self, out=None):
+        """Grab the whole monitor as a BGR array"""
+        sct = self._get_sct()
+        return self.to_bgr(sct.grab(self._local.monitor), out)
+
+    def close(self):
+        """Release the calling thread's mss handle"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+_capture = None
+
+def get_capture():
+    """Return the process-wide capture service"""
+    global _capture
+    if _capture is None:
+        _capture = ScreenCapture()
+    return _capture
+
+def set_capture(capture):
+    """Replace the process-wide capture service (e.g. with a replay backend)"""
+    global _capture
+    _capture = capture
+
+# Anything with time() and sleep(); the waits between grabs go through it so replays can run on a virtual clock
+_clock = time
+
+def get_clock():
+    """Return the clock the waits between grabs use"""
+    return _clock
+
+def set_clock(clock):
+    """Make the waits use clock instead of the time module (None restores it)"""
+    global _clock
+    _clock = clock if clock is not None else time
@@ -0,0 +1,173 @@
+# Headless Monte Carlo simulator for evaluating the bot's strategy
+
+import argparse
+import time
+import numpy as np
+from config import *
+from decision_engine import DecisionEngine, get_decision_engine
+from ev_solver import EVSolver, get_ev_solver, cashout_amount, NET_WIN_AMOUNT
+from cards import Card, ALL_CARDS, RANKS, VALUE_NAMES
+
+RED_SUIT_INDICES = [SUITS.index(suit) for suit in RED_SUITS]
+
+def build_policy(decisions, solver):
+    """Flatten the decision tables and cash-out policy into NumPy lookup arrays"""
+    max_value = max(RANKS) + 1
+
+    higher = np.zeros(max_value, dtype=bool)
+    for value in RANKS:
+        higher[value] = decisions.round2_choice(value) == "higher"
+
+    inside = np.zeros((max_value, max_value), dtype=bool)
+    for low in RANKS:
+        for high in RANKS:
+            if low <= high:
+                inside[low, high] = decisions.round3_choice(low, high) == "inside"
+
+    # Round 4 suit by seen-suit counts (each count 0..3)
+    round4_suit = np.zeros((4, 4, 4, 4), dtype=np.int8)
+    cash3 = np.zeros((4, 4, 4, 4), dtype=bool)
+    for counts, suit in decisions.round4.items():
+        if sum(counts) == 3:
+            round4_suit[counts] = SUITS.index(suit)
+            # Round 3 cash-out only depends on the seen suits, so any three cards with them will do
+            seen_suits = [SUITS[index] for index, count in enumerate(counts) for _ in range(count)]
+            cards = tuple(Card.from_value(VALUE_NAMES[RANKS[n]], suit) for n, suit in enumerate(seen_suits))
+            cash3[counts] = solver.should_cash_out(cards)
+
+    codes = range(CARDS_PER_DECK)
+    cash1 = np.array([solver.should_cash_out((ALL_CARDS[c],)) for c in codes])
+    cash2 = np.zeros((CARDS_PER_DECK, CARDS_PER_DECK), dtype=bool)
+    for c1 in codes:
+        for c2 in codes:
+            if c1 != c2 or solver.fresh_deck:
+                cash2[c1, c2] = solver.should_cash_out((ALL_CARDS[c1], ALL_CARDS[c2]))
+
+    return {'higher': higher, 'inside': inside, 'round4_suit': round4_suit,
+            'cash1': cash1, 'cash2': cash2, 'cash3': cash3}
+
+def deal(rng, games, fresh_deck):
+    """Deal four cards per game, either from a fresh deck each round or without replacement"""
+    if fresh_deck:
+        return rng.integers(0, CARDS_PER_DECK, size=(games, 4))
+
+    cards = np.empty((games, 4), dtype=np.int64)
+    for draw in range(4):
+        # Pick among the remaining cards, then skip over the ones already dealt (in ascending order)
+        card = rng.integers(0, CARDS_PER_DECK - draw, size=games)
+        seen = np.sort(cards[:, :draw], axis=1)
+        for column in range(draw):
+            card += card >= seen[:, column]
+        cards[:, draw] = card
+    return cards
+
+def play(cards, policy, cash_out=True):
+    """Return (payoff, outcome) per game, outcome being the round lost (1-4), 5 for a win or -N for a cash-out after round N"""
+    values = np.array(RANKS)[cards % CARDS_PER_SUIT]
+    suits = cards // CARDS_PER_SUIT
+    v1, v2, v3 = values[:, 0], values[:, 1], values[:, 2]
+
+    win1 = np.isin(suits[:, 0], RED_SUIT_INDICES)  # Always bet on red
+    win2 = np.where(policy['higher'][v1], v2 >= v1, v2 < v1)
+    low = np.minimum(v1, v2)
+    high = np.maximum(v1, v2)
+    win3 = np.where(policy['inside'][low, high], (v3 >= low) & (v3 <= high), (v3 < low) | (v3 > high))
+    counts = (suits[:, :3, None] == np.arange(4)).sum(axis=1)
+    counts_index = (counts[:, 0], counts[:, 1], counts[:, 2], counts[:, 3])
+    win4 = suits[:, 3] == policy['round4_suit'][counts_index]
+
+    cash = [policy['cash1'][cards[:, 0]],
+            policy['cash2'][cards[:, 0], cards[:, 1]],
+            policy['cash3'][counts_index]]
+
+    payoff = np.zeros(len(cards))
+    outcome = np.zeros(len(cards), dtype=np.int8)
+    alive = np.ones(len(cards), dtype=bool)
+    for round_number, won in enumerate([win1, win2, win3], start=1):
+        lost = alive & ~won
+        payoff[lost] = -BET_AMOUNT
+        outcome[lost] = round_number
+        alive &= won
+        if cash_out:
+            cashed = alive & cash[round_number - 1]
+            payoff[cashed] = cashout_amount(round_number)
+            outcome[cashed] = -round_number
+            alive &= ~cashed
+
+    payoff[alive & win4] = NET_WIN_AMOUNT
+    outcome[alive & win4] = 5
+    payoff[alive & ~win4] = -BET_AMOUNT
+    outcome[alive & ~win4] = 4
+    return payoff, outcome
+
+def simulate(games, batch_size=1_000_000, seed=None, fresh_deck=FRESH_DECK_PER_ROUND, cash_out=True):
+    """Play games in batches and return summary statistics"""
+    rng = np.random.default_rng(seed)
+    # Choices and cash-outs are solved for the same deck model the cards are dealt from
+    if fresh_deck == FRESH_DECK_PER_ROUND:
+        policy = build_policy(get_decision_engine(), get_ev_solver())
+    else:
+        policy = build_policy(DecisionEngine(fresh_deck), EVSolver(fresh_deck))
+
+    total = 0.0
+    total_sq = 0.0
+    wins = 0
+    cashouts = 0
+    balance = 0.0
+    peak = 0.0
+    max_drawdown = 0.0
+    played = 0
+    start_time = time.perf_counter()
+
+    while played < games:
+        batch = min(batch_size, games - played)
+        payoff, outcome = play(deal(rng, batch, fresh_deck), policy, cash_out)
+
+        total += payoff.sum()
+        total_sq += (payoff ** 2).sum()
+        wins += int((outcome == 5).sum())
+        cashouts += int((outcome < 0).sum())
+
+        # Drawdown of the running balance, carried across batches
+        running = balance + np.cumsum(payoff)
+        peaks = np.maximum(peak, np.maximum.accumulate(running))
+        max_drawdown = max(max_drawdown, float((peaks - running).max()))
+        balance = float(running[-1])
+        peak = float(peaks[-1])
+        played += batch
+
+    elapsed = time.perf_counter() - start_time
+    mean = total / games
+    return {
+        'games': games,
+        'win_rate': wins / games,
+        'cashout_rate': cashouts / games,
+        'ev_per_game': mean,
+        'variance': total_sq / games - mean ** 2,
+        'max_drawdown': max_drawdown,
+        'final_balance': balance,
+        'games_per_second': games / elapsed if elapsed else float('inf'),
+    }
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Simulate Ride The Bus games with the bot's strategy")
+    parser.add_argument("--games", type=int, default=1_000_000, help="Number of games to simulate")
+    parser.add_argument("--batch-size", type=int, default=1_000_000, help="Games dealt per NumPy batch")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    deck = parser.add_mutually_exclusive_group()
+    deck.add_argument("--fresh-deck", dest="fresh_deck", action="store_true", help="Fresh deck every round")
+    deck.add_argument("--shared-deck", dest="fresh_deck", action="store_false", help="Remove dealt cards from the deck")
+    parser.set_defaults(fresh_deck=FRESH_DECK_PER_ROUND)
+    parser.add_argument("--no-cash-out", action="store_true", help="Never cash out before round 4")
+    args = parser.parse_args()
+
+    stats = simulate(args.games, args.batch_size, args.seed, args.fresh_deck, not args.no_cash_out)
+    print(f"Games: {stats['games']} ({'fresh' if args.fresh_deck else 'shared'} deck)")
+    print(f"Win rate: {stats['win_rate'] * 100:.3f}%, cash-out rate: {stats['cashout_rate'] * 100:.3f}%")
+    print(f"EV per game: ${stats['ev_per_game']:.2f} (std dev ${stats['variance'] ** 0.5:.2f})")
+    print(f"Final balance: ${stats['final_balance']:.0f}, max drawdown: ${stats['max_drawdown']:.0f}")
+    print(f"Speed: {stats['games_per_second']:,.0f} games/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# Batched suit template matching (all suits and scales in one FFT correlation)
+
+import cv2
+import numpy as np
+from config import *
+from template_bank import get_template_bank, region_size
+from buffers import scratch
+
+class SuitMatcher:
+    """Scores every suit/scale template against a suit region in one batched pass
+
+    Computes the same normalised correlation as cv2.TM_CCOEFF_NORMED, but for all
+    templates at once: zero-padded templates share one stack of FFT correlations,
+    and window statistics for every candidate position come from a single pair of
+    integral images via precomputed corner indices.
+    """
+
+    def __init__(self, suit_variants, region_shape):
+        self.shape = region_shape[:2]
+        height, width = self.shape
+        stride = width + 1  # Row stride of the integral images
+
+        suits = []
+        scales = []
+        templates = []
+        positions = []
+        corners = [[], [], [], []]
+        norms = []
+        areas = []
+        segments = []
+
+        for suit, variants in suit_variants.items():
+            for scale, template in variants:
+                h, w = template.shape[:2]
+                if h > height or w > width:
+                    continue
+
+                # Zero-mean the template per channel, as TM_CCOEFF does
+                centred = template.astype(np.float64)
+                centred -= centred.mean(axis=(0, 1))
+                padded = np.zeros((3, height, width))
+                padded[:, :h, :w] = centred.transpose(2, 0, 1)
+
+                # Only positions where the template fits entirely inside the region are valid
+                ys, xs = np.mgrid[:height - h + 1, :width - w + 1]
+                ys = ys.ravel()
+                xs = xs.ravel()
+
+                segments.append(len(norms))
+                positions.append(len(templates) * height * width + ys * width + xs)
+                corners[0].append(ys * stride + xs)
+                corners[1].append(ys * stride + xs + w)
+                corners[2].append((ys + h) * stride + xs)
+                corners[3].append((ys + h) * stride + xs + w)
+                norms.extend([np.sqrt((centred ** 2).sum())] * len(ys))
+                areas.extend([float(h * w)] * len(ys))
+
+                suits.append(suit)
+                scales.append(scale)
+                templates.append(padded)
+
+        self.suits = np.array(suits)
+        self.scales = np.array(scales)
+        # Only suits with at least one template that fits the region can be scored
+        self.suit_names = [suit for suit in SUITS if suit in suits]
+        if not templates:
+            return
+        # Conjugated spectra turn the FFT product into a cross-correlation; stored channel-major
+        # so each channel's product is one contiguous multiply
+        self.template_spectra = np.ascontiguousarray(np.conj(np.fft.rfft2(np.array(templates))).transpose(1, 0, 2, 3))
+        self.positions = np.concatenate(positions)
+        self.corners = [np.concatenate(corner) for corner in corners]
+        # Same corners for each channel of the (channel-minor) integral image, grouped by channel
+        self.channel_corners = [np.concatenate([corner * 3 + channel for channel in range(3)])
+                                for corner in self.corners]
+        self.norms = np.array(norms)
+        self.areas = np.array(areas)
+        self.segments = np.array(segments)
+
+    def buffer(self, name, shape, dtype=np.float64):
+        """This thread's scratch buffer for this matcher"""
+        return scratch(f"suit_matcher_{id(self)}_{name}", shape, dtype)
+
+    def corner_sum(self, table, corners, name):
+        """Window sums d - b - c + a gathered from a flattened integral image into scratch buffers"""
+        a, b, c, d = corners
+        total = np.take(table, d, out=self.buffer(name, d.shape))
+        gathered = self.buffer("gathered", d.shape)
+        total -= np.take(table, b, out=gathered)
+        total -= np.take(table, c, out=gathered)
+        total += np.take(table, a, out=gathered)
+        return total
+
+    def scores(self, suit_region):
+        """Return the best TM_CCOEFF_NORMED score of every template (one entry per suit/scale)
+
+        Intermediates live in per-thread buffers reused across calls; the FFTs are the only
+        allocations left, as numpy.fft has no out parameter.
+        """
+        height, width = self.shape
+        image = self.buffer("image", (3, height, width))
+        np.copyto(image, suit_region.transpose(2, 0, 1))
+
+        # Correlation with every zero-mean template, summed over channels
+        spectrum = np.fft.rfft2(image)
+        product = self.buffer("product", self.template_spectra.shape[1:], np.complex128)
+        channel_product = self.buffer("channel_product", product.shape, np.complex128)
+        np.multiply(self.template_spectra[0], spectrum[0], out=product)
+        for channel in (1, 2):
+            product += np.multiply(self.template_spectra[channel], spectrum[channel], out=channel_product)
+        correlation = np.fft.irfft2(product, s=self.shape)
+        numerator = np.take(correlation.ravel(), self.positions, out=self.buffer("numerator", self.positions.shape))
+
+        # Window sums of I (per channel) and I^2 (all channels) for every candidate position
+        sums, squares = cv2.integral2(suit_region, sum=self.buffer("sums", (height + 1, width + 1, 3)),
+                                      sqsum=self.buffer("squares", (height + 1, width + 1, 3)),
+                                      sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+        squares = np.sum(squares, axis=2, out=self.buffer("square_total", (height + 1, width + 1)))
+        window_sum = self.corner_sum(sums.ravel(), self.channel_corners, "window_sum").reshape(3, -1)
+        variance = self.corner_sum(squares.ravel(), self.corners, "variance")
+
+        # variance = window_sq - sum over channels of window_sum^2 / area
+        window_sum *= window_sum
+        mean_square = np.sum(window_sum, axis=0, out=self.buffer("mean_square", self.areas.shape))
+        mean_square /= self.areas
+        variance -= mean_square
+
+        # scores = numerator / max(sqrt(max(variance, 1e-6)) * norm, 1e-6)
+        denominator = np.maximum(variance, 1e-6, out=variance)
+        np.sqrt(denominator, out=denominator)
+        denominator *= self.norms
+        np.maximum(denominator, 1e-6, out=denominator)
+        scores = np.divide(numerator, denominator, out=numerator)
+        # Best position per template
+        return np.maximum.reduceat(scores, self.segments, out=self.buffer("best", self.segments.shape))
+
+    def suit_scores(self, suit_region):
+        """Return {suit: best score over its scales}, empty if there are no usable templates"""
+        if not self.suit_names:
+            return {}
+        scores = self.scores(suit_region)
+        return {suit: float(scores[self.suits == suit].max()) for suit in self.suit_names}
+
+_matchers = {}
+
+def get_suit_matcher(suits=None):
+    """Return the shared matcher for the given suits (all suits by default), building it on first use"""
+    key = tuple(suits) if suits else tuple(SUITS)
+    if key not in _matchers:
+        width, height = region_size(SUIT_TOP_LEFT, SUIT_BOTTOM_RIGHT)
+        suit_variants = {suit: variants for suit, variants in get_template_bank().suit_variants.items()
+                         if suit in key}
+        _matchers[key] = SuitMatcher(suit_variants, (height, width))
+    return _matchers[key]
@@ -0,0 +1,125 @@
+# Preprocessed template bank for suit and number matching
+
+import os
+import cv2
+from config import *
+
+SUIT_SCALES = [0.7, 0.85, 1.0, 1.15, 1.3]
+NUMBER_SCALES = [0.8, 0.9, 1.0, 1.1, 1.2]
+NUMBER_THRESHOLD = 150  # Binary threshold shared by OCR and number templates
+
+def load_suit_templates():
+    """Load the suit template images"""
+    templates = {}
+    for suit in SUITS:
+        template_path = os.path.join(TEMPLATE_DIR, f"{suit}.png")
+        if os.path.exists(template_path):
+            templates[suit] = cv2.imread(template_path)
+        else:
+            print(f"Warning: Template for {suit} not found at {template_path}")
+    return templates
+
+def load_number_templates():
+    """Load number template images for fallback recognition"""
+    templates = {}
+    if os.path.exists(NUMBER_TEMPLATE_DIR):
+        for filename in sorted(os.listdir(NUMBER_TEMPLATE_DIR)):
+            if filename.endswith('.png'):
+                number = filename.split('.')[0]  # Get number from filename (e.g., "2" from "2.png")
+                if '_' in number:
+                    continue  # Extra glyph samples are only used by the glyph classifier
+                template_path = os.path.join(NUMBER_TEMPLATE_DIR, filename)
+                templates[number] = cv2.imread(template_path)
+    else:
+        print(f"Warning: Number template directory not found at {NUMBER_TEMPLATE_DIR}")
+    return templates
+
+def load_glyph_samples():
+    """Load labelled value glyphs from the number templates and captured glyph directories"""
+    samples = []
+    for directory in [NUMBER_TEMPLATE_DIR, GLYPH_SAMPLE_DIR]:
+        if not os.path.exists(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith('.png'):
+                # "10.png" and "10_3.png" are both samples of "10"
+                label = filename.split('.')[0].split('_')[0]
+                if label not in CARD_VALUES:
+                    continue
+                image = cv2.imread(os.path.join(directory, filename))
+                if image is not None:
+                    samples.append((label, image))
+    return samples
+
+def threshold_number_image(image, gray=None, thresh=None):
+    """Grayscale and binary-threshold an image the same way for OCR and templates
+
+    gray and thresh are optional preallocated outputs the size of image.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+    _, thresh = cv2.threshold(gray, NUMBER_THRESHOLD, 255, cv2.THRESH_BINARY_INV, dst=thresh)
+    return thresh
+
+def scale_variants(image, scales, max_size):
+    """Resize an image to each scale, dropping variants larger than max_size (width, height)"""
+    variants = []
+    max_width, max_height = max_size
+    for scale in scales:
+        width = int(image.shape[1] * scale)
+        height = int(image.shape[0] * scale)
+
+        # Skip if the template is too large for the region
+        if width > max_width or height > max_height:
+            continue
+
+        resized = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        variants.append((scale, resized))
+    return variants
+
+def rescale_to_layout(image):
+    """Resize a template captured on the reference layout to the calibrated layout"""
+    if image is None or LAYOUT_SCALE == 1.0:
+        return image
+    width = max(1, round(image.shape[1] * LAYOUT_SCALE))
+    height = max(1, round(image.shape[0] * LAYOUT_SCALE))
+    interpolation = cv2.INTER_AREA if LAYOUT_SCALE < 1.0 else cv2.INTER_LINEAR
+    return cv2.resize(image, (width, height), interpolation=interpolation)
+
+def region_size(top_left, bottom_right):
+    """Return the (width, height) of a region"""
+    return (bottom_right[0] - top_left[0], bottom_right[1] - top_left[1])
+
+class TemplateBank:
+    """Suit and number templates, preprocessed and scaled once"""
+
+    def __init__(self):
+        suit_size = region_size(SUIT_TOP_LEFT, SUIT_BOTTOM_RIGHT)
+        ocr_size = region_size(OCR_TOP_LEFT, OCR_BOTTOM_RIGHT)
+
+        # Templates were captured on the reference layout, so bring them to the calibrated scale first
+        self.suit_templates = {suit: rescale_to_layout(image) for suit, image in load_suit_templates().items()}
+        self.number_templates = {number: rescale_to_layout(image)
+                                 for number, image in load_number_templates().items()}
+        # [(label, thresholded glyph), ...] for the in-process value classifier
+        self.glyph_samples = [(label, threshold_number_image(rescale_to_layout(image)))
+                              for label, image in load_glyph_samples()]
+
+        # {suit: [(scale, template), ...]} used as-is (no preprocessing)
+        self.suit_variants = {
+            suit: scale_variants(template, SUIT_SCALES, suit_size)
+            for suit, template in self.suit_templates.items()
+        }
+        # {number: [(scale, thresholded template), ...]}
+        self.number_variants = {
+            number: scale_variants(threshold_number_image(template), NUMBER_SCALES, ocr_size)
+            for number, template in self.number_templates.items()
+        }
+
+_bank = None
+
+def get_template_bank():
+    """Return the shared template bank, building it on first use"""
+    global _bank
+    if _bank is None:
+        _bank = TemplateBank()
+    return _bank
@@ -1,15 +1,29 @@
 # UI interaction functions
 
-import pyautogui
-import time
 import numpy as np
-import cv2
-import mss
 from config import *
+from screen_capture import get_capture, get_clock
+from instrumentation import timed
+from buffers import scratch
+from background_writer import write_line
 
+_click_sink = None
+
+def set_click_sink(sink):
+    """Send clicks to sink(x, y) instead of the mouse (None restores pyautogui)"""
+    global _click_sink
+    _click_sink = sink
+
+@timed("click")
 def click_button(position):
-    """Click at the specified position"""
-    x, y = position
+    """Click at the specified position (monitor coordinates)"""
+    x = position[0] + MONITOR_ORIGIN[0]
+    y = position[1] + MONITOR_ORIGIN[1]
+    if _click_sink is not None:
+        _click_sink(x, y)
+        return
+    # Imported on first click so headless replays never need a display
+    import pyautogui
     pyautogui.click(x, y)
 
 def click_ready():
@@ -56,6 +70,10 @@ def click_clubs():
     """Click the Clubs button (same as Black/Lower/Outside)"""
     click_button(BLACK_LOWER_OUTSIDE_CLUBS_BUTTON)
 
+def click_cash_out():
+    """Click the Cash Out button"""
+    click_button(CASHOUT_BUTTON)
+
 def click_suit(suit):
     """Click the button for the specified suit"""
     if suit == "Hearts":
@@ -67,14 +85,13 @@ def click_suit(suit):
     elif suit == "Spades":
         click_spades()
     else:
-        print(f"Unknown suit: {suit}")
+        write_line(f"Unknown suit: {suit}")
 
 def get_pixel_color(x, y, screen=None):
     """Get the RGB color of a pixel on screen"""
     if screen is None:
-        with mss.mss() as sct:
-            monitor = sct.monitors[1]
-            screen = np.array(sct.grab(monitor))
+        # Only grab the single pixel we need
+        return get_capture().grab_pixel(x, y)
     
     # Get the pixel color (BGR format)
     pixel_color = screen[y, x, :3]
@@ -96,27 +113,148 @@ def is_option_available(screen=None):
     return (color_matches(pixel_color, OPTION_AVAILABLE_COLOR1) or
             color_matches(pixel_color, OPTION_AVAILABLE_COLOR2))
 
-def wait_for_option_available(timeout=15, check_interval=0.1):
-    """Wait until options are available or timeout is reached"""
-    start_time = time.time()
+class OptionWatcher:
+    """Adaptive-rate watcher for the option pixel that records transition latency"""
+    
+    def __init__(self, min_interval=OPTION_POLL_MIN_INTERVAL, max_interval=OPTION_POLL_MAX_INTERVAL,
+                 backoff=OPTION_POLL_BACKOFF):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.last_latency = None
+        self.latency_count = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.polls = 0
+    
+    def wait(self, timeout=MAX_OPTION_WAIT_TIME):
+        """Wait for options to become available, polling fast first and backing off while idle"""
+        start_time = get_clock().time()
+        interval = self.min_interval
+        
+        while True:
+            self.polls += 1
+            if is_option_available():
+                self.record_latency(get_clock().time() - start_time)
+                return True
+            
+            elapsed = get_clock().time() - start_time
+            if elapsed >= timeout:
+                return False
+            
+            get_clock().sleep(min(interval, timeout - elapsed))
+            interval = min(interval * self.backoff, self.max_interval)
+    
+    def record_latency(self, latency):
+        """Record the time from the action to options becoming available"""
+        self.last_latency = latency
+        self.latency_count += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
     
-    while time.time() - start_time < timeout:
+    def summary(self):
+        """Return a one-line summary of measured option latencies"""
+        if not self.latency_count:
+            return "Option latency: no transitions measured"
+        average = self.latency_total / self.latency_count
+        return (f"Option latency: avg {average * 1000:.0f} ms, max {self.latency_max * 1000:.0f} ms "
+                f"over {self.latency_count} transitions ({self.polls} polls)")
+
+option_watcher = OptionWatcher()
+
+@timed("wait_option")
+def wait_for_option_available(timeout=MAX_OPTION_WAIT_TIME):
+    """Wait until options are available or timeout is reached"""
+    return option_watcher.wait(timeout)
+
+@timed("wait_ready")
+def ready_up(max_attempts=MAX_READY_ATTEMPTS, reclick_interval=READY_RECLICK_INTERVAL):
+    """Click Ready and wait for the options, clicking again only if nothing changed"""
+    for attempt in range(max_attempts):
         if is_option_available():
             return True
-        time.sleep(check_interval)
-    
+        click_ready()
+        if option_watcher.wait(timeout=reclick_interval):
+            return True
     return False
 
-def wait_for_card_to_appear():
-    """Wait a fixed 1.5 seconds for the card to appear"""
-    time.sleep(1.5)
-    return True
+def wait_for_game_window(title=GAME_WINDOW_TITLE, timeout=GAME_WINDOW_TIMEOUT):
+    """Wait until the game window is active, returning True once it is (or when it cannot be checked)"""
+    if _click_sink is not None:
+        return True  # Clicks are not going to a real window (replay)
+    try:
+        import pygetwindow
+    except (ImportError, NotImplementedError):
+        return True  # No window API on this platform, so start straight away
+    
+    deadline = get_clock().time() + timeout
+    announced = False
+    while True:
+        window = pygetwindow.getActiveWindow()
+        if window is not None and title in window.title:
+            return True
+        if get_clock().time() >= deadline:
+            write_line(f"Warning: {title} window not active after {timeout} s, starting anyway")
+            return False
+        if not announced:
+            write_line(f"Waiting for the {title} window...")
+            announced = True
+        get_clock().sleep(CHECK_INTERVAL)
+
+@timed("capture_face")
+def capture_card_face():
+    """Grab a downsampled intensity snapshot of the card region for change detection"""
+    shape = (CARD_TOP_RIGHT[1] - CARD_TOP_LEFT[1], CARD_TOP_RIGHT[0] - CARD_TOP_LEFT[0], 3)
+    card = get_capture().grab_region(CARD_TOP_LEFT, CARD_TOP_RIGHT, out=scratch('card_face', shape))
+    # Every 4th pixel is plenty to notice a new card; sum BGR as a cheap intensity
+    return card[::4, ::4].sum(axis=2, dtype=np.int16)
+
+def frame_difference(frame1, frame2):
+    """Mean absolute difference between two card snapshots"""
+    return float(np.abs(frame1 - frame2).mean())
+
+class CardSettleTracker:
+    """Follows card face snapshots taken after a click until a new card has replaced baseline and settled"""
+    
+    def __init__(self, baseline, stable_frames=CARD_STABLE_FRAMES):
+        self.baseline = baseline
+        self.stable_frames = stable_frames
+        self.changed = False
+        self.stable_count = 0
+        self.previous = baseline
+    
+    def update(self, frame):
+        """Take the next snapshot, returning True once the new card is settled"""
+        settled = False
+        if not self.changed:
+            # Wait for the card region to move away from what was shown before the click
+            self.changed = frame_difference(frame, self.baseline) > CARD_CHANGE_THRESHOLD
+        elif frame_difference(frame, self.previous) <= CARD_STABLE_THRESHOLD:
+            # Card has changed; wait for the flip animation to settle
+            self.stable_count += 1
+            settled = self.stable_count >= self.stable_frames
+        else:
+            self.stable_count = 0
+        self.previous = frame
+        return settled
+
+@timed("wait_card")
+def wait_for_card_to_appear(baseline=None, timeout=CARD_WAIT_TIME, stable_frames=CARD_STABLE_FRAMES,
+                            check_interval=CARD_POLL_INTERVAL):
+    """Wait until a new card face replaces baseline and stays stable, or timeout is reached"""
+    start_time = get_clock().time()
+    if baseline is None:
+        baseline = capture_card_face()
+    tracker = CardSettleTracker(baseline, stable_frames)
+    
+    while get_clock().time() - start_time < timeout:
+        get_clock().sleep(check_interval)
+        if tracker.update(capture_card_face()):
+            return True
+    
+    return False
 
 def capture_screen():
-    """Capture the current screen using MSS"""
-    with mss.mss() as sct:
-        monitor = sct.monitors[1]
-        screen = np.array(sct.grab(monitor))
-        # Convert BGRA to BGR (remove alpha channel)
-        return screen[:, :, :3]
+    """Capture the current screen using the shared capture service"""
+    return get_capture().grab_full()
     
\ No newline at end of file
@@ -4,7 +4,12 @@ import time
 import logging
 import os
 from datetime import datetime
+from itertools import count
 import cv2
+from instrumentation import timed
+from background_writer import get_background_writer
+
+_debug_image_counter = count()
 
 
 def setup_logging():
@@ -44,11 +49,18 @@ def save_debug_image(image, prefix="debug"):
     debug_dir = "debug_images"
     os.makedirs(debug_dir, exist_ok=True)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = os.path.join(debug_dir, f"{prefix}_{timestamp}.png")
+    # Sub-second timestamp and a counter keep rapid saves from clobbering each other
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    filename = os.path.join(debug_dir, f"{prefix}_{timestamp}_{next(_debug_image_counter)}.png")
+
+    image = image.copy()
+
+    def write():
+        cv2.imwrite(filename, image)
+        logging.info(f"Saved debug image: {filename}")
 
-    cv2.imwrite(filename, image)
-    logging.info(f"Saved debug image: {filename}")
+    # Keep the PNG encode and disk write off the caller's thread
+    get_background_writer().submit(write, sample=True)
 
     return filename
 
@@ -69,15 +81,5 @@ def safe_execute(func, *args, max_retries=3, **kwargs):
 
 
 def timing_decorator(func):
-    """Decorator to measure execution time"""
-
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        logging.debug(
-            f"{func.__name__} took {end_time - start_time:.2f} seconds to execute"
-        )
-        return result
-
-    return wrapper
+    """Decorator to record execution time in the latency histogram named after the function"""
+    return timed(func.__name__)(func)